@@ -0,0 +1,52 @@
+import re
+
+class ActionMatcher:
+    """
+    Single compiled regex over every action trigger word, built once per game.
+    Matches on word boundaries, so "recut" doesn't trigger "cut" and "fishing" doesn't trigger "fish".
+    """
+
+    def __init__(self, action_requirements, tool_actions, impossible_actions, movement_words, lexicon=None):
+        self.action_requirements = action_requirements
+        self.lexicon = lexicon  # When set, "knife" is satisfied by a "rusted knife" in the pack
+        self.rules = {}  # trigger -> [(kind, action)]
+        for action in action_requirements:
+            self.add_rule(action, "requirement", action)
+        for tool, words in tool_actions.items():
+            for word in words:
+                self.add_rule(word, "tool", tool)
+        for word in impossible_actions:
+            self.add_rule(word, "impossible", word)
+        for word in movement_words:
+            self.add_rule(word, "movement", word)
+
+        # Longest triggers first so "make fire" wins over "fire"
+        triggers = sorted(self.rules, key=len, reverse=True)
+        alternation = "|".join(r"\s+".join(re.escape(word) for word in trigger.split()) for trigger in triggers)
+        self.pattern = re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+
+    def add_rule(self, trigger, kind, action):
+        self.rules.setdefault(" ".join(trigger.lower().split()), []).append((kind, action))
+
+    def match(self, text, inventory):
+        """Every action triggered by text, in order, with the items the player is missing for each"""
+        matches = []
+        for found in self.pattern.finditer(text):
+            trigger = " ".join(found.group(0).lower().split())
+            for kind, action in self.rules[trigger]:
+                if kind == "requirement":
+                    missing = [item for item in self.action_requirements[action] if not self.has_item(item, inventory)]
+                elif kind == "tool":
+                    missing = [action] if not self.has_item(action, inventory) else []
+                else:
+                    missing = []
+                matches.append({"trigger": trigger, "kind": kind, "action": action, "missing": missing})
+        return matches
+
+    def has_item(self, item, inventory):
+        if item in inventory:
+            return True
+        return self.lexicon is not None and self.lexicon.find_in(item, inventory) is not None
+
+    def is_movement(self, text):
+        return any(match["kind"] == "movement" for match in self.match(text, {}))
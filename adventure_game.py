@@ -1,10 +1,13 @@
+from startup_timer import startup_timer
 import tkinter as tk
 from game_logic import AppalachianAdventure
 
+startup_timer.mark("imports")
+
 def main():
     root = tk.Tk()
     game = AppalachianAdventure(root)
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
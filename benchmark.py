@@ -0,0 +1,278 @@
+"""
+Command-level benchmark: drives scripted sessions through GameEngine with the offline model backend.
+
+    python benchmark.py --turns 300 --save
+    python benchmark.py --compare benchmark_results/<earlier run>.json
+
+Reports p50/p95/p99 latency per command, JSON bytes read and written per turn, and memory
+allocated per turn. Runs in a scratch copy of the save files so the real game data isn't touched.
+"""
+import argparse
+import builtins
+import json
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from llm_cache import ResponseCache
+from offline_backend import OfflineBackend
+
+# Save files copied into the scratch directory before each run
+DATA_FILES = ["game_frame.json", "game_state.json", "crafting_recipes.json", "game_characters.json"]
+
+# One loop of a typical session; repeated until the turn count is reached
+SESSION_SCRIPT = [
+    "go north",
+    "/items",
+    "/pickup branch",
+    "/pickup stone",
+    "/loot",
+    "/craftable",
+    "/craft snare",
+    "/craft snare --auto",
+    "/talk vendor",
+    "/buy rope",
+    "goodbye",
+    "/inventory",
+    "follow the trail east",
+    "/pickup berry",
+    "/craft torch"
+]
+
+RESULTS_DIR = "benchmark_results"
+
+def stage_turn(engine, user_input):
+    """
+    Set up what a scripted command needs before it is timed. /talk meets whoever the scene's
+    npc_pool rolled, so the roll is staged here. The purse and the vendor's shelf are topped up
+    so /buy always reaches the purchase itself rather than an "out of" or "not enough" check.
+    """
+    if user_input.startswith("/talk "):
+        engine.actions.load_frame()["scene_context"]["encounter"] = user_input.split(None, 1)[1]
+    elif user_input.startswith("/buy "):
+        engine.state.money = max(engine.state.money, 100)
+        vendor = engine.state.current_npc
+        stock = (vendor or {}).get("inventory", {}).get(user_input[5:].strip())
+        if stock is not None:
+            stock[0] = max(stock[0], 1)
+
+def check_turn(engine, user_input, money_before):
+    """An error message if a scripted command didn't do what it is there to measure, else None"""
+    if user_input.startswith("/buy ") and engine.state.money >= money_before:
+        return f"nothing was bought: {engine.output.recent_text(200).strip().splitlines()[-1]}"
+    return None
+
+def command_name(user_input):
+    """Group turns by slash command; free text is movement, narration or dialogue"""
+    if user_input.startswith("/"):
+        return user_input.split()[0]
+    return "free text"
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+class CountingFile:
+    """Wraps a file object, counting the bytes that go through read and write calls"""
+
+    def __init__(self, file, counter):
+        self.file = file
+        self.counter = counter
+
+    def read(self, *args):
+        data = self.file.read(*args)
+        self.counter["read"] += len(data)
+        return data
+
+    def readline(self, *args):
+        data = self.file.readline(*args)
+        self.counter["read"] += len(data)
+        return data
+
+    def write(self, data):
+        self.counter["written"] += len(data)
+        return self.file.write(data)
+
+    def __iter__(self):
+        for line in self.file:
+            self.counter["read"] += len(line)
+            yield line
+
+    def __enter__(self):
+        self.file.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self.file.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+class IOCounter:
+    """Counts bytes moved through open() and os.fdopen() for .json/.jsonl files while active"""
+
+    def __init__(self):
+        self.counter = {"read": 0, "written": 0}
+        self.original_open = builtins.open
+        self.original_fdopen = os.fdopen
+
+    def __enter__(self):
+        def counting_open(file, *args, **kwargs):
+            handle = self.original_open(file, *args, **kwargs)
+            if isinstance(file, str) and file.endswith((".json", ".jsonl")):
+                return CountingFile(handle, self.counter)
+            return handle
+
+        def counting_fdopen(fd, *args, **kwargs):
+            # FrameStore and NPCJournal write their JSON snapshots through temp files
+            return CountingFile(self.original_fdopen(fd, *args, **kwargs), self.counter)
+
+        builtins.open = counting_open
+        os.fdopen = counting_fdopen
+        return self
+
+    def __exit__(self, *exc):
+        builtins.open = self.original_open
+        os.fdopen = self.original_fdopen
+
+    def take(self):
+        """Bytes read and written since the last call"""
+        counts = dict(self.counter)
+        self.counter["read"] = self.counter["written"] = 0
+        return counts
+
+def run_session(turns, seed, latency, trace_allocations):
+    """Play turns commands in a fresh scratch copy of the game; returns one record per turn"""
+    from llm_client import model_client
+    from game_engine import GameEngine
+
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    previous_dir = os.getcwd()
+    previous_backend = model_client.backend
+    previous_cache = model_client.cache
+    records = []
+    with tempfile.TemporaryDirectory(prefix="trail-bench-") as scratch:
+        for name in DATA_FILES:
+            if os.path.exists(os.path.join(source_dir, name)):
+                shutil.copy(os.path.join(source_dir, name), scratch)
+        os.chdir(scratch)
+        model_client.set_backend(OfflineBackend(latency=latency, seed=seed))
+        model_client.cache = ResponseCache(cache_dir=os.path.join(scratch, ".llm_cache"))  # Cold cache every run
+        try:
+            with IOCounter() as io_counter:
+                engine = GameEngine()
+                engine.actions.streaming = False
+                engine.actions.pool_rng.seed(seed)
+                io_counter.take()
+                if trace_allocations:
+                    tracemalloc.start()
+                for turn in range(turns):
+                    user_input = SESSION_SCRIPT[turn % len(SESSION_SCRIPT)]
+                    stage_turn(engine, user_input)
+                    money_before = engine.state.money
+                    if trace_allocations:
+                        tracemalloc.reset_peak()
+                        before, _ = tracemalloc.get_traced_memory()
+                    started = time.perf_counter()
+                    try:
+                        engine.handle(user_input)
+                        failed = False
+                    except Exception as e:
+                        print(f"Turn {turn} ({user_input}) failed: {e}")
+                        failed = True
+                    elapsed = (time.perf_counter() - started) * 1000
+                    problem = None if failed else check_turn(engine, user_input, money_before)
+                    if problem:
+                        print(f"Turn {turn} ({user_input}) failed: {problem}")
+                        failed = True
+                    record = {"command": command_name(user_input), "ms": elapsed, "failed": failed}
+                    record.update(io_counter.take())
+                    if trace_allocations:
+                        _, peak = tracemalloc.get_traced_memory()
+                        record["alloc_bytes"] = peak - before
+                    records.append(record)
+                if trace_allocations:
+                    tracemalloc.stop()
+                engine.state.frame_store.flush()
+        finally:
+            model_client.set_backend(previous_backend)
+            model_client.cache = previous_cache
+            os.chdir(previous_dir)
+    return records
+
+def summarize(timed, traced):
+    """Per-command latency percentiles (from the untraced run) plus per-turn I/O and allocations"""
+    summary = {}
+    for command in dict.fromkeys(record["command"] for record in timed):
+        latencies = [record["ms"] for record in timed if record["command"] == command]
+        turns = [record for record in timed if record["command"] == command]
+        allocations = [record["alloc_bytes"] for record in traced if record["command"] == command]
+        summary[command] = {
+            "turns": len(turns),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "json_read_per_turn": sum(record["read"] for record in turns) / len(turns),
+            "json_written_per_turn": sum(record["written"] for record in turns) / len(turns),
+            "alloc_bytes_per_turn": sum(allocations) / len(allocations) if allocations else None,
+            "failures": sum(record["failed"] for record in turns)
+        }
+    return summary
+
+def print_summary(summary, baseline=None):
+    print(f"{'command':<14}{'turns':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'json rd/turn':>14}{'json wr/turn':>14}{'alloc KiB':>11}")
+    for command, stats in summary.items():
+        alloc = stats["alloc_bytes_per_turn"]
+        line = (f"{command:<14}{stats['turns']:>6}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}"
+                f"{stats['json_read_per_turn']:>14.0f}{stats['json_written_per_turn']:>14.0f}"
+                f"{(alloc / 1024 if alloc is not None else 0):>11.1f}")
+        if baseline and command in baseline:
+            before = baseline[command]["p95_ms"]
+            if before:
+                line += f"   p95 {(stats['p95_ms'] - before) / before * 100:+.0f}%"
+        print(line)
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark game commands against the offline model backend")
+    parser.add_argument("--turns", type=int, default=240)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected model latency per call")
+    parser.add_argument("--save", action="store_true", help=f"Write results to {RESULTS_DIR}/<commit>.json")
+    parser.add_argument("--compare", help="Earlier results file to compare p95 latency against")
+    args = parser.parse_args()
+
+    timed = run_session(args.turns, args.seed, args.latency_ms / 1000, trace_allocations=False)
+    # tracemalloc slows everything down, so allocations come from a second identical run
+    traced = run_session(args.turns, args.seed, args.latency_ms / 1000, trace_allocations=True)
+    summary = summarize(timed, traced)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)["commands"]
+    print_summary(summary, baseline)
+
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        commit = current_commit()
+        path = os.path.join(RESULTS_DIR, f"{commit}.json")
+        with open(path, "w") as f:
+            json.dump({"commit": commit, "turns": args.turns, "seed": args.seed,
+                       "latency_ms": args.latency_ms, "commands": summary}, f, indent=4)
+        print(f"Saved results to {path}")
+
+if __name__ == "__main__":
+    main()
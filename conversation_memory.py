@@ -0,0 +1,55 @@
+from llm_stats import CallStats
+from rolling_summary import RollingSummary
+
+SUMMARY_PROMPT = """Summarize this conversation between a traveler and {name} for {name}'s memory.
+Keep names, promises, trades, favors and anything the traveler revealed about themselves.
+Reply with at most 3 short sentences and nothing else."""
+
+class ConversationMemory(RollingSummary):
+    """
+    What an NPC remembers of past conversations, kept under a fixed token budget.
+    Stored on the NPC as memory["conversation"] = {"summary": ..., "turns": [[player, reply], ...]}.
+    """
+
+    field = "turns"
+
+    def __init__(self, budget_tokens=600, recent_turns=6, fold_every=4):
+        super().__init__(budget_tokens, recent_turns, fold_every)
+
+    @staticmethod
+    def conversation(npc):
+        memory = npc.setdefault("memory", {})
+        return memory.setdefault("conversation", {"summary": "", "turns": []})
+
+    def entry_cost(self, turn):
+        player, reply = turn
+        return CallStats.estimate_tokens(player) + CallStats.estimate_tokens(reply)
+
+    def build_messages(self, npc, system_prompt, user_input):
+        """Chat messages for the next reply: persona, what the NPC remembers, then the player's line"""
+        conversation = self.conversation(npc)
+        budget = self.budget_tokens - CallStats.estimate_tokens(system_prompt) - CallStats.estimate_tokens(user_input)
+        if conversation["summary"]:
+            system_prompt += f"\nWhat you remember of earlier conversations with the traveler: {conversation['summary']}"
+            budget -= CallStats.estimate_tokens(conversation["summary"])
+
+        history = []
+        for player, reply in self.recent(conversation, budget):
+            history += [{"role": "user", "content": player}, {"role": "assistant", "content": reply}]
+        return [{"role": "system", "content": system_prompt}, *history, {"role": "user", "content": user_input}]
+
+    def record(self, npc, user_input, reply):
+        """Add an exchange; returns the older turns to summarize, or [] if it isn't time yet"""
+        # Namesakes are different NPCs, so folds are tracked per NPC record rather than per name
+        return self.append(self.conversation(npc), [user_input, reply], id(npc))
+
+    def summary_messages(self, npc, overflow):
+        """Prompt folding overflow turns into the NPC's existing summary"""
+        lines = []
+        for player, reply in overflow:
+            lines.append(f"Traveler: {player}")
+            lines.append(f"{npc['name']}: {reply}")
+        return self.fold_messages(self.conversation(npc), SUMMARY_PROMPT.format(name=npc["name"]), lines)
+
+    def apply_summary(self, npc, summary, folded):
+        self.fold(self.conversation(npc), summary, folded, id(npc))
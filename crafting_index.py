@@ -0,0 +1,108 @@
+from collections import defaultdict
+
+class CraftingIndex:
+    """
+    Inverted index from item key to the recipe materials it can satisfy.
+    Lets "what can I craft now" be answered by walking the inventory instead of every recipe;
+    the recipes it turns up are then checked with allocate(), the same rule /craft uses.
+    """
+
+    def __init__(self, recipes, lexicon):
+        self.lexicon = lexicon  # Resolves names, plurals and substitutes to shared keys
+        self.by_key = defaultdict(list)  # item key -> [(recipe, material, amount)]
+        self.recipe_materials = {}  # recipe -> {material: amount}
+        self.recipe_keys = {}  # recipe -> keys it was indexed under, for removal
+        self.free_recipes = set()  # Recipes that need no materials at all
+        self.rebuild(recipes)
+
+    def rebuild(self, recipes):
+        self.by_key.clear()
+        self.recipe_materials.clear()
+        self.recipe_keys.clear()
+        self.free_recipes.clear()
+        for name, recipe in recipes.items():
+            self.add_recipe(name, recipe)
+
+    def add_recipe(self, name, recipe):
+        """Index a new or changed recipe without touching the rest"""
+        if name in self.recipe_materials or name in self.free_recipes:
+            self.remove_recipe(name)
+
+        materials = recipe.get("materials", {})
+        if not materials:
+            self.free_recipes.add(name)
+            return
+
+        self.recipe_materials[name] = dict(materials)
+        keys = set()
+        for material, amount in materials.items():
+            # The material itself followed by anything that can substitute for it
+            for key in self.lexicon.substitute_keys(material):
+                self.by_key[key].append((name, material, amount))
+                keys.add(key)
+        self.recipe_keys[name] = keys
+
+    def remove_recipe(self, name):
+        self.free_recipes.discard(name)
+        if self.recipe_materials.pop(name, None) is None:
+            return
+        for key in self.recipe_keys.pop(name):
+            postings = [posting for posting in self.by_key[key] if posting[0] != name]
+            if postings:
+                self.by_key[key] = postings
+            else:
+                del self.by_key[key]
+
+    def craftable(self, inventory):
+        """Return the sorted names of recipes the inventory can satisfy right now"""
+        # Recipes with something on hand for every material are worth checking in full
+        touched = defaultdict(set)
+        for item, quantity in inventory.items():
+            if quantity > 0:
+                for recipe, material, _ in self.by_key.get(self.lexicon.key(item), ()):
+                    touched[recipe].add(material)
+
+        craftable = set(self.free_recipes)
+        for recipe, materials in touched.items():
+            needed = self.recipe_materials[recipe]
+            if len(materials) == len(needed) and not self.allocate(needed, inventory)[0]:
+                craftable.add(recipe)
+        return sorted(craftable)
+
+    def allocate(self, materials, inventory):
+        """
+        Return (missing, substitutions) for crafting one of a recipe from inventory.
+        Each material takes its exact name, else one entry of it or a substitute with enough,
+        else several entries that add up ({entry: quantity}); stock claimed for one material
+        isn't offered to the next. missing lists "amount material" for whatever falls short.
+        """
+        left = dict(inventory)
+        missing = []
+        substitutions = {}
+        for material, amount in materials.items():
+            if left.get(material, 0) >= amount:
+                left[material] -= amount
+                continue
+
+            keys = self.lexicon.substitute_keys(material)
+            single = self.lexicon.find_with_quantity(material, left, amount, keys)
+            if single is not None:
+                left[single] -= amount
+                substitutions[material] = single
+                continue
+
+            pooled = {}
+            short = amount
+            for item, quantity in left.items():
+                if quantity > 0 and (item == material or self.lexicon.key(item) in keys):
+                    pooled[item] = min(quantity, short)
+                    short -= pooled[item]
+                    if short == 0:
+                        break
+            if short > 0:
+                missing.append(f"{amount} {material}")
+                continue
+            for item, quantity in pooled.items():
+                left[item] -= quantity
+            substitutions[material] = pooled
+        return missing, substitutions
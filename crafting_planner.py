@@ -0,0 +1,147 @@
+import math
+
+class CraftingPlanner:
+    """
+    Works out a full crafting chain for an item from the current inventory.
+    Recipes can depend on each other ("wheel" needs "vine", "vine" needs "long branches"),
+    so the planner orders the dependency graph once, then walks it top-down adding up how
+    many of each sub-item are needed before deciding how many to craft. Every item is
+    resolved once no matter how many recipes share it, stock is used before crafting, and
+    the cheapest of several substitutes is picked using memoized crafting costs.
+    Recipe cycles are broken by only crafting items that come later in the order.
+    """
+
+    def __init__(self, recipes, lexicon):
+        self.recipes = recipes
+        self.lexicon = lexicon  # Resolves names, plurals and substitutes to shared keys
+        self.cost_memo = {}  # item -> craft actions needed to make one from raw materials
+        self.recipes_by_key = None  # item key -> recipe names; rebuilt lazily after changes
+
+    def invalidate(self):
+        """Forget memoized costs after the recipe book changes"""
+        self.cost_memo.clear()
+        self.recipes_by_key = None
+
+    def options_for(self, material):
+        """Recipes that can produce material or one of its substitutes, exact name first"""
+        if self.recipes_by_key is None:
+            self.recipes_by_key = {}
+            for name in self.recipes:
+                self.recipes_by_key.setdefault(self.lexicon.key(name), []).append(name)
+
+        options = [material] if material in self.recipes else []
+        for key in self.lexicon.substitute_keys(material):
+            for name in self.recipes_by_key.get(key, ()):
+                if name not in options:
+                    options.append(name)
+        return options
+
+    def stock_for(self, material, available, stock_by_key):
+        """Inventory entries that can be used for material, exact name first"""
+        names = [material] if material in available else []
+        for key in self.lexicon.substitute_keys(material):
+            for name in stock_by_key.get(key, ()):
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def dependency_order(self, item_name):
+        """Items reachable from item_name, each listed before everything it is crafted from"""
+        postorder = []
+        seen = {item_name}
+        stack = [(item_name, iter(self.dependencies(item_name)))]
+        while stack:
+            item, children = stack[-1]
+            for child in children:
+                if child not in seen:
+                    seen.add(child)
+                    stack.append((child, iter(self.dependencies(child))))
+                    break
+            else:
+                stack.pop()
+                postorder.append(item)
+        postorder.reverse()
+        return postorder
+
+    def dependencies(self, item):
+        for material in self.recipes[item].get("materials", {}):
+            yield from self.options_for(material)
+
+    def update_costs(self, order, position):
+        """Fill cost_memo bottom-up so substitutes can be compared without recursion"""
+        for item in reversed(order):
+            if item in self.cost_memo:
+                continue
+            cost = 1
+            for material, amount in self.recipes[item].get("materials", {}).items():
+                if amount <= 0:
+                    continue
+                costs = [self.option_cost(option, position[item], position) for option in self.options_for(material)]
+                # Materials that can't be crafted here are gathered instead, which costs no crafts
+                cost += amount * min([option_cost for option_cost in costs if option_cost < math.inf], default=0)
+            self.cost_memo[item] = cost
+
+    def option_cost(self, option, after, position):
+        if position.get(option, -1) <= after:
+            return math.inf  # Would close a cycle
+        return self.cost_memo.get(option, math.inf)
+
+    def plan(self, item_name, inventory):
+        """
+        Plan how to craft one item_name.
+        Returns {"steps": [(item, count), ...], "missing": {material: amount}}, with steps in
+        crafting order, or None if there is no recipe for item_name.
+        """
+        if item_name not in self.recipes:
+            return None
+
+        order = self.dependency_order(item_name)
+        position = {item: index for index, item in enumerate(order)}
+        self.update_costs(order, position)
+
+        available = dict(inventory)  # Stock not yet claimed; the real inventory isn't touched
+        stock_by_key = {}
+        for name in inventory:
+            stock_by_key.setdefault(self.lexicon.key(name), []).append(name)
+        to_craft = {item_name: 1}
+        missing = {}
+        steps = []
+        # Parents come first, so an item's total demand is known before it is visited
+        for item in order:
+            count = to_craft.get(item, 0)
+            if count <= 0:
+                continue
+            steps.append((item, count))
+            for material, amount in self.recipes[item].get("materials", {}).items():
+                if amount > 0:
+                    self.allocate(material, amount * count, position[item], position,
+                                  available, stock_by_key, to_craft, missing)
+
+        steps.reverse()
+        return {"steps": steps, "missing": missing}
+
+    def allocate(self, material, needed, after, position, available, stock_by_key, to_craft, missing):
+        """Claim needed of material from stock (or one substitute), queueing crafts for the shortfall"""
+        stock = self.stock_for(material, available, stock_by_key)
+        for name in stock:
+            if available.get(name, 0) >= needed:
+                available[name] -= needed
+                return
+
+        craftable = [option for option in self.options_for(material)
+                     if self.option_cost(option, after, position) < math.inf]
+        if not craftable:
+            # Partial stock of the material and its substitutes adds up; only the rest is missing
+            for name in stock:
+                claimed = min(available[name], needed)
+                available[name] -= claimed
+                needed -= claimed
+            if needed > 0:
+                missing[material] = missing.get(material, 0) + needed
+            return
+
+        option = min(craftable, key=lambda candidate:
+                     (needed - available.get(candidate, 0)) * self.cost_memo[candidate])
+        from_stock = min(available.get(option, 0), needed)
+        available[option] = available.get(option, 0) - from_stock
+        to_craft[option] = to_craft.get(option, 0) + needed - from_stock
@@ -0,0 +1,46 @@
+import atexit
+import json
+from jsonl_journal import atomic_write
+
+class FrameStore:
+    """
+    Keeps game_frame.json in memory as the source of truth.
+    Changes are marked dirty and written back at most once per turn with an atomic rename.
+    """
+
+    def __init__(self, path="game_frame.json"):
+        self.path = path
+        self.data = self.load()
+        self.dirty = False
+        self.changes = 0  # Bumped on every change, so others can tell the frame moved on since they looked
+        self.writes = 0  # Number of flushes that actually hit the disk
+        atexit.register(self.flush)
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"current_scene": 0, "scene_data": "", "scene_context": {}}
+
+    def replace(self, data):
+        """Swap in a whole new frame, e.g. one rewritten by the model"""
+        self.data = data
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        self.dirty = True
+        self.changes += 1
+
+    def flush(self):
+        """Write the frame if it changed since the last flush"""
+        if not self.dirty:
+            return False
+        try:
+            atomic_write(self.path, json.dumps(self.data, indent=4))
+        except OSError as e:
+            print(f"Error saving frame: {e}")
+            return False
+        self.dirty = False
+        self.writes += 1
+        return True
@@ -1,60 +1,92 @@
-import openai
 import time
 import random
 import json
-import tkinter as tk
+import copy
+from llm_client import model_client
+from stream_render import StreamRenderer
+from conversation_memory import ConversationMemory
+from scene_memory import SceneMemory
+from scene_prefetch import ScenePrefetcher
+from pool_sampler import ScenePoolSampler
+from location_graph import move_key
+from inventory import InventoryTransaction, InventoryError
+
+POOL_TIERS = ("common", "uncommon", "rare")
+
+# Pool fields of the combined scene prompt, left out while the player stays in one place and reuses its pools
+SCENE_POOL_FIELDS = """
+    "item_pool": {
+        "common": ["branch", "stone", "leaf"],
+        "uncommon": ["herbs", "tools", "rope"],
+        "rare": ["coins", "jewelry", "weapons"]
+    },
+    "npc_pool": {
+        "common": ["traveler", "hunter", "farmer"],
+        "uncommon": ["vendor", "guide", "craftsman"],
+        "rare": ["doctor", "soldier", "mystic"]
+    },"""
+
+# Used whenever the model's scene pools are missing or malformed
+DEFAULT_SCENE_POOLS = {
+    "item_pool": {
+        "common": ["stick", "stone", "leaf"],
+        "uncommon": [],
+        "rare": []
+    },
+    "npc_pool": {
+        "common": ["traveler"],
+        "uncommon": [],
+        "rare": []
+    }
+}
 
 class GameActions:
-    def __init__(self, state, ui):
+    def __init__(self, state, output):
         self.state = state
-        self.ui = ui
+        self.output = output  # GameOutput; renderers subscribe to its events
+        self.worker = None  # RequestWorker when running under Tk; None runs requests inline
+        self.combined_scene_mode = True  # One structured call for narration, pools and items per move
+        self.streaming = True  # Show narration and dialogue token by token instead of all at once
         self.conversation_history = []
+        self.conversation_memory = ConversationMemory()  # Per-NPC dialogue memory under a token budget
+        self.scene_memory = SceneMemory()  # Journey summary plus recent scenes for narration prompts
+        self.scene_prefetcher = ScenePrefetcher(enabled=False)  # Likely next moves; GameEngine.set_worker turns it on
+        self.pool_rng = random.Random()  # Item and encounter rolls; seed it for reproducible runs
+        self.pool_sampler = None  # ScenePoolSampler for the current scene pools
+        self.refresh_revisits = False  # Regenerate a revisited place's narration in the background
         self.system_instructions = """Describe Appalachian Trail scenes in 1-2 brief sentences.
         Always include 3-4 interactable items naturally in every description.
         Keep descriptions short but rich with collectible items."""
 
     def can_perform_action(self, user_input):
-        input_words = user_input.lower().split()
-        
-        for action in self.state.action_requirements.keys():
-            if action in user_input.lower():
-                required_items = self.state.action_requirements[action]
-                missing_items = [item for item in required_items if item not in self.state.inventory]
-                if missing_items:
-                    self.ui.text_widget.insert(tk.END, 
-                        f"You need {', '.join(missing_items)} to {action}.\n", "game_text")
-                    return False
-
-        tool_actions = {
-            "bow": ["shoot", "aim", "fire"],
-            "knife": ["cut", "slice", "carve"],
-            "axe": ["chop", "split", "hack"],
-            "rope": ["tie", "bind", "secure"],
-            "fishing line": ["fish", "catch"],
-        }
+        # One pass finds every triggered action and what the player lacks for it
+        matches = self.state.action_matcher.match(user_input, self.state.inventory)
 
-        for tool, actions in tool_actions.items():
-            if any(action in input_words for action in actions) and tool not in self.state.inventory:
-                self.ui.text_widget.insert(tk.END, 
-                    f"You need a {tool} to do that.\n", "game_text")
+        for match in matches:
+            if match["kind"] == "requirement" and match["missing"]:
+                self.output.text(
+                    f"You need {', '.join(match['missing'])} to {match['action']}.\n")
                 return False
 
-        impossible_actions = [
-            "fly", "teleport", "swim", "dive", "build", "create", "craft"
-        ]
-        if any(action in input_words for action in impossible_actions):
-            self.ui.text_widget.insert(tk.END, 
-                "That action is not possible in this environment.\n", "game_text")
+        for match in matches:
+            if match["kind"] == "tool" and match["missing"]:
+                self.output.text(
+                    f"You need a {match['action']} to do that.\n")
+                return False
+
+        if any(match["kind"] == "impossible" for match in matches):
+            self.output.text(
+                "That action is not possible in this environment.\n")
             return False
 
-        if any(word in input_words for word in ['go', 'walk', 'follow', 'climb', 'hike']):
+        if any(match["kind"] == "movement" for match in matches):
             if self.state.health <= 20:
-                self.ui.text_widget.insert(tk.END, 
-                    "You are too exhausted to travel. You should rest first.\n", "game_text")
+                self.output.text(
+                    "You are too exhausted to travel. You should rest first.\n")
                 return False
             if self.state.energy <= 10:
-                self.ui.text_widget.insert(tk.END, 
-                    "You are too hungry to travel. You should eat something.\n", "game_text")
+                self.output.text(
+                    "You are too hungry to travel. You should eat something.\n")
                 return False
 
         if "pick up" in user_input:
@@ -66,14 +98,16 @@ class GameActions:
                 item = " ".join(parts)
                 quantity = 1
                 
-            if item not in self.state.environment_items:
-                self.ui.text_widget.insert(tk.END, f"There is no {item} here to pick up.\n", "game_text")
+            scene_item = self.state.lexicon.find_in(item, self.state.environment_items)
+            if scene_item is None:
+                self.output.text(f"There is no {item} here to pick up.\n")
                 return False
+            item = scene_item
             if not self.is_item_pickable(item):
-                self.ui.text_widget.insert(tk.END, f"You cannot pick up the {item}.\n", "game_text")
+                self.output.text(f"You cannot pick up the {item}.\n")
                 return False
             if quantity > self.state.environment_items.get(item, 0):
-                self.ui.text_widget.insert(tk.END, f"There aren't that many {item}s available.\n", "game_text")
+                self.output.text(f"There aren't that many {item}s available.\n")
                 return False
 
         return True
@@ -109,6 +143,58 @@ class GameActions:
             text = text[0].upper() + text[1:]
         return text
 
+    def run_request(self, request, callback, background=False):
+        """
+        Run a blocking model request off the main thread when a worker is attached.
+        background=True is for housekeeping the player isn't waiting on: it doesn't make the game busy.
+        """
+        if self.worker is None:
+            callback(request())
+        elif background:
+            self.worker.submit_background(request, callback)
+        else:
+            self.worker.submit(request, callback)
+
+    @staticmethod
+    def or_none(request, activity):
+        """
+        Wrap a background model request so a failure is printed and gives None instead of raising.
+        request is defined at the call site, so call stats still name the method that made it.
+        """
+        def guarded():
+            try:
+                return request()
+            except Exception as e:
+                print(f"Error {activity}: {e}")
+                return None
+        return guarded
+
+    @staticmethod
+    def is_json(content):
+        """Whether a reply parses, so only usable item lists are cached"""
+        try:
+            json.loads(content)
+            return True
+        except ValueError:
+            return False
+
+    def run_stream(self, stream, renderer, callback):
+        """
+        Like run_request, but stream() yields text chunks that renderer shows as they arrive.
+        callback gets the full text and whether the renderer displayed any of it.
+        """
+        def done(content):
+            callback(content, renderer.finish())
+
+        if self.worker is None:
+            parts = []
+            for chunk in stream():
+                parts.append(chunk)
+                renderer.feed(chunk)
+            done("".join(parts))
+        else:
+            self.worker.submit_stream(stream, renderer.feed, done)
+
     def get_response(self, user_input):
         # If in conversation, only handle dialogue
         if self.state.current_npc:
@@ -126,87 +212,369 @@ class GameActions:
             
             # Generate character if mentioned in scene
             if target in scene_text.lower():
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{
-                        "role": "system",
-                        "content": """Create an NPC based on the mentioned character.
-                        Format as JSON: {
-                            "name": "descriptive name",
-                            "type": "role/occupation",
-                            "description": "brief description",
-                            "personality": "key traits",
-                            "dialogue_style": "speaking style"
-                        }"""
-                    }, {
-                        "role": "user",
-                        "content": f"Create character for: {target} mentioned in: {scene_text}"
-                    }]
-                )
-                
-                try:
-                    npc_data = json.loads(response.choices[0].message['content'])
-                    self.state.current_npc = npc_data
-                    self.state.save_npc(npc_data)
-                    
-                    # Start conversation
-                    self.talk_to_npc("hello")
-                    return
-                except:
-                    pass
+                def request():
+                    response = model_client.complete(
+                        model="gpt-3.5-turbo",
+                        messages=[{
+                            "role": "system",
+                            "content": """Create an NPC based on the mentioned character.
+                            Format as JSON: {
+                                "name": "descriptive name",
+                                "type": "role/occupation",
+                                "description": "brief description",
+                                "personality": "key traits",
+                                "dialogue_style": "speaking style"
+                            }"""
+                        }, {
+                            "role": "user",
+                            "content": f"Create character for: {target} mentioned in: {scene_text}"
+                        }]
+                    )
+                    return response
+
+                self.run_request(request, lambda content: self.start_scene_conversation(content, user_input))
+                return
 
+        self.narrate_scene(user_input)
+
+    def start_scene_conversation(self, content, user_input):
+        """Begin talking to a character generated from the scene, or narrate if that failed"""
+        try:
+            npc_data = json.loads(content)
+            self.state.set_current_npc(npc_data, self.state.save_npc(npc_data))
+            
+            # Start conversation
+            self.talk_to_npc("hello")
+        except:
+            self.narrate_scene(user_input)
+
+    def narrate_scene(self, user_input):
         # Load current context
         frame_data = self.load_frame()
         context = frame_data.get("scene_context", {})
-        current_scene = frame_data.get("scene_data", "")
-        
-        previous_scenes = context.get("previous_scenes", [])
-        if current_scene and (not previous_scenes or current_scene != previous_scenes[-1]):
-            previous_scenes.append(current_scene)
-        context["previous_scenes"] = previous_scenes[-3:]  # keep last 3
+        # Bounded journey summary plus the last few scenes; the current one is the newest
+        scene_history_str = self.scene_memory.history(context)
+
+        # Places already visited are served from the location graph without a model call
+        self.leave_location(context)
+        moving = self.state.action_matcher.is_movement(user_input)
+        if moving:
+            known = self.state.location_graph.exit(context.get("node"), move_key(user_input))
+        else:
+            known = context.get("node") if "look" in user_input.lower() else None
+        if known is not None and known in self.state.location_graph.nodes:
+            self.revisit_location(user_input, frame_data, context, known, scene_history_str)
+            return
+
+        if self.combined_scene_mode:
+            if moving:
+                content = self.scene_prefetcher.take(user_input, frame_data.get("scene_data", ""))
+                if content is not None:
+                    self.apply_scene(user_input, frame_data, context, content)
+                    return
+
+            messages = self.scene_messages(scene_history_str, user_input, with_pools=self.reusable_pools(context, user_input) is None)
+
+            if self.streaming:
+                # Only the narration field is shown while the JSON streams in
+                self.run_stream(
+                    lambda: model_client.stream(model="gpt-3.5-turbo", messages=messages, max_tokens=300, temperature=0.7),
+                    StreamRenderer(self.output, json_field="narration"),
+                    lambda content, shown: self.apply_scene(user_input, frame_data, context, content, shown))
+                return
+
+            def request():
+                return model_client.complete(
+                    model="gpt-3.5-turbo",
+                    messages=messages,
+                    max_tokens=300,
+                    temperature=0.7
+                )
+
+            self.run_request(request, lambda content: self.apply_scene(user_input, frame_data, context, content))
+            return
 
-        # Update messages to refer to multiple previous scenes
-        scene_history_str = " | ".join(previous_scenes)
         messages = [
             {"role": "system", "content": f"""You are describing scenes on the Appalachian Trail in 1897.
 Keep each new scene to 1-2 sentences.
-Base it on past scenes: {scene_history_str}"""},
+Base it on the journey so far:
+{scene_history_str}"""},
             {"role": "user", "content": user_input}
         ]
 
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            max_tokens=50,  # Reduced for shorter responses
-            temperature=0.7
-        )
-        
-        story = self.clean_response(response.choices[0].message['content'])
+        if self.streaming:
+            self.run_stream(
+                lambda: model_client.stream(model="gpt-3.5-turbo", messages=messages, max_tokens=50, temperature=0.7),
+                StreamRenderer(self.output),
+                lambda content, shown: self.apply_narration(user_input, frame_data, context, content, shown))
+            return
+
+        def request():
+            response = model_client.complete(
+                model="gpt-3.5-turbo",
+                messages=messages,
+                max_tokens=50,  # Reduced for shorter responses
+                temperature=0.7
+            )
+            return response
+
+        self.run_request(request, lambda content: self.apply_narration(user_input, frame_data, context, content))
+
+    def scene_messages(self, scene_history_str, user_input, with_pools=True):
+        """Prompt for one combined narration + pools + items reply; pools are skipped when reused"""
+        pool_fields = SCENE_POOL_FIELDS if with_pools else ""
+        return [
+            {"role": "system", "content": f"""You are describing scenes on the Appalachian Trail in 1897.
+Base the new scene on the journey so far:
+{scene_history_str}
+Respond with only JSON in this exact format:
+{{
+    "narration": "the new scene in 1-2 sentences",{pool_fields}
+    "items": {{"item mentioned in the narration": quantity}}
+}}
+Only include period-appropriate items and characters for 1897.
+Items must be things in the narration that could be picked up and carried, with quantities 1-10."""},
+            {"role": "user", "content": user_input}
+        ]
+
+    def prefetch_scenes(self):
+        """Generate the likeliest next moves in the background while the player reads and types"""
+        if self.worker is None or not self.scene_prefetcher.enabled:
+            return
+        frame_data = self.load_frame()
+        context = frame_data.get("scene_context", {})
+        scene_history_str = self.scene_memory.history(context)
+        generation = self.scene_prefetcher.start(frame_data.get("scene_data", ""))
+        node = self.state.location_graph.nodes.get(context.get("node"))
+        known = node["exits"] if node is not None else ()  # Those are served from the graph anyway
+
+        for key, wording in self.scene_prefetcher.predict(known):
+            # A move leads somewhere new, so its pools are always generated
+            messages = self.scene_messages(scene_history_str, wording)
+            request = self.or_none(
+                lambda messages=messages: model_client.complete(
+                    model="gpt-3.5-turbo", messages=messages, max_tokens=300, temperature=0.7),
+                "prefetching a scene")
+            self.run_request(
+                request,
+                lambda content, key=key, messages=messages: self.scene_prefetcher.store(generation, key, messages, content),
+                background=True)
+
+    def reusable_pools(self, context, user_input):
+        """
+        The current place's pools if user_input keeps the player there (anything but a move),
+        else None: a new place gets new pools
+        """
+        if self.state.action_matcher.is_movement(user_input) or context.get("node") not in self.state.location_graph.nodes:
+            return None
+        return context.get("scene_pools")
+
+    def populate_scene(self, context, items=None, leftover=False):
+        """
+        Fill the scene from its pools: environment items (unless the narration named some,
+        or leftover says items is what a revisited place still has) and an encounter roll.
+        The sampler is rebuilt only when the pools change.
+        """
+        pools = context.get("scene_pools") or DEFAULT_SCENE_POOLS
+        if self.pool_sampler is None or self.pool_sampler.pools is not pools:
+            self.pool_sampler = ScenePoolSampler(pools, self.pool_rng)
+        self.state.environment_items = dict(items or {}) if leftover else items or self.pool_sampler.draw_items()
+        context["encounter"] = self.pool_sampler.roll_encounter()
+
+    def record_location(self, user_input, context, new_context, story):
+        """
+        Add the new scene to the location graph. A move makes a new place linked to the one
+        left behind; anything else (searching, resting, ...) updates the current place.
+        """
+        graph = self.state.location_graph
+        current = context.get("node")
+        if current in graph.nodes and not self.state.action_matcher.is_movement(user_input):
+            graph.update(current, {"narration": story, "location": new_context["location"]})
+            new_context["node"] = current
+            return
+        node_id = graph.add(story, new_context["location"], new_context.get("scene_pools"))
+        if current in graph.nodes:
+            graph.connect(current, move_key(user_input), node_id)
+        new_context["node"] = node_id
+
+    def leave_location(self, context):
+        """Remember what is left at the current place (items not picked up, its pools)"""
+        node_id = context.get("node")
+        if node_id in self.state.location_graph.nodes:
+            self.state.location_graph.update(node_id, {
+                "items": dict(self.state.environment_items),
+                "scene_pools": context.get("scene_pools")
+            })
+
+    def revisit_location(self, user_input, frame_data, context, node_id, scene_history_str):
+        """Show a place from the location graph: its narration, pools and whatever items were left there"""
+        node = self.state.location_graph.nodes[node_id]
+        new_context = self.build_scene_context(context, node["narration"])
+        new_context["location"] = node["location"]
+        new_context["scene_pools"] = node["scene_pools"] or copy.deepcopy(DEFAULT_SCENE_POOLS)
+        new_context["node"] = node_id
+        self.remember_scene(new_context, node["narration"])
+        frame_data["scene_context"] = new_context
+        frame_data["scene_data"] = node["narration"]
+        self.state.frame_store.mark_dirty()
+
+        self.output.text(f"{node['narration']}\n")
+        self.populate_scene(new_context, node["items"], leftover=True)
+        self.check_for_new_location(user_input)
+        if self.refresh_revisits:
+            self.refresh_location(node_id, scene_history_str, user_input)
+        self.prefetch_scenes()
+
+    def refresh_location(self, node_id, scene_history_str, user_input):
+        """Regenerate a revisited place's narration in the background for next time"""
+        messages = self.scene_messages(scene_history_str, user_input, with_pools=False)
+        request = self.or_none(
+            lambda: model_client.complete(model="gpt-3.5-turbo", messages=messages, max_tokens=300, temperature=0.7),
+            "refreshing a location")
+
+        def apply_refresh(content):
+            if content:
+                narration = self.clean_response(self.parse_scene_payload(content, {})["narration"])
+                if narration:
+                    self.state.location_graph.update(node_id, {"narration": narration})
+
+        self.run_request(request, apply_refresh, background=True)
+
+    def build_scene_context(self, context, story):
+        location = context.get("location", "unknown")
+        previous_locations = list(context.get("previous_locations", []))
+        if location != "unknown" and (not previous_locations or previous_locations[-1] != location):
+            previous_locations.append(location)
+        return {
+            "location": location,
+            "previous_locations": previous_locations[-5:],
+            "environment": context.get("environment", {}),
+            "scene_data": story,
+            "discovered_locations": context.get("discovered_locations", []),
+            "scene_memory": self.scene_memory.memory(context)
+        }
+
+    def remember_scene(self, context, story):
+        """Add a scene to the journey memory; older scenes are summarized in the background"""
+        memory = self.scene_memory.memory(context)
+        folded = self.scene_memory.record(context, story)
+        if not folded:
+            return
+        messages = self.scene_memory.summary_messages(memory, folded)
+        request = self.or_none(
+            lambda: model_client.complete(model="gpt-3.5-turbo", messages=messages, max_tokens=120, temperature=0.3),
+            "summarizing the journey")
+
+        def apply_summary(content):
+            self.scene_memory.apply_summary(memory, content, folded)
+            self.state.frame_store.mark_dirty()
+
+        self.run_request(request, apply_summary, background=True)
+
+    def parse_scene_payload(self, content, pools=None):
+        """
+        Validate a combined scene response. Falls back to the default pools when they are
+        missing or malformed, and treats a non-JSON reply as plain narration.
+        pools, when given, are reused as they are instead of reading them from the response.
+        """
+        try:
+            payload = json.loads(content)
+        except (json.JSONDecodeError, TypeError):
+            payload = None
+        if not isinstance(payload, dict):
+            print("Scene response was not JSON; using it as narration")
+            return {"narration": str(content or ""), "scene_pools": pools or copy.deepcopy(DEFAULT_SCENE_POOLS), "items": {}}
+
+        narration = payload.get("narration")
+        if not isinstance(narration, str):
+            narration = ""
+
+        if pools is not None:
+            scene_pools = pools
+        else:
+            scene_pools = self.parse_scene_pools(payload)
+
+        items = {}
+        raw_items = payload.get("items")
+        if isinstance(raw_items, dict):
+            for item, quantity in raw_items.items():
+                if isinstance(item, str) and item.strip() and isinstance(quantity, (int, float)):
+                    items[item.strip().lower()] = max(1, min(10, int(quantity)))
+
+        return {"narration": narration, "scene_pools": scene_pools, "items": items}
+
+    def parse_scene_pools(self, payload):
+        """item_pool and npc_pool from a scene response, replacing any malformed one with the default"""
+        scene_pools = {}
+        for pool_name, default_pool in DEFAULT_SCENE_POOLS.items():
+            pool = payload.get(pool_name)
+            if not isinstance(pool, dict) or not all(
+                    isinstance(pool.get(tier, []), list) for tier in POOL_TIERS):
+                print(f"Invalid {pool_name} in scene response; using defaults")
+                scene_pools[pool_name] = copy.deepcopy(default_pool)
+                continue
+            scene_pools[pool_name] = {
+                tier: [entry for entry in pool.get(tier, []) if isinstance(entry, str) and entry.strip()]
+                for tier in POOL_TIERS
+            }
+        return scene_pools
+
+    def apply_scene(self, user_input, frame_data, context, content, shown=False):
+        """
+        Apply a combined narration + pools + items response with a single frame write.
+        shown means the narration was already streamed into the story widget.
+        """
+        scene = self.parse_scene_payload(content, self.reusable_pools(context, user_input))
+        story = self.clean_response(scene["narration"])
+
+        try:
+            new_context = self.build_scene_context(context, story)
+            new_context["scene_pools"] = scene["scene_pools"]
+            self.remember_scene(new_context, story)
+            self.record_location(user_input, context, new_context, story)
+            frame_data["scene_context"] = new_context
+            frame_data["scene_data"] = story
+            self.state.frame_store.mark_dirty()
+        except Exception as e:
+            print(f"Error updating context: {e}")
+
+        if not shown:
+            self.output.text(f"{story}\n")
+        self.populate_scene(frame_data["scene_context"], scene["items"])
+        self.check_for_new_location(user_input)
+        self.prefetch_scenes()
+
+    def apply_narration(self, user_input, frame_data, context, content, shown=False):
+        story = self.clean_response(content)
         
         # Update scene context
         try:
-            new_context = {
-                "location": context.get("location", "unknown"),
-                "previous_locations": context.get("previous_locations", [])[-4:] + [context.get("location")],
-                "environment": context.get("environment", {}),
-                "scene_data": story,
-                "discovered_locations": context.get("discovered_locations", [])
-            }
-            
+            new_context = self.build_scene_context(context, story)
+            self.remember_scene(new_context, story)
+            self.record_location(user_input, context, new_context, story)
+
             # Update frame data
             frame_data["scene_context"] = new_context
             frame_data["scene_data"] = story
-            with open("game_frame.json", "w") as f:
-                json.dump(frame_data, f, indent=4)
+            self.state.frame_store.mark_dirty()
                 
         except Exception as e:
             print(f"Error updating context: {e}")
             
-        self.ui.text_widget.insert(tk.END, f"{story}\n", "game_text")
+        if not shown:
+            self.output.text(f"{story}\n")
+
+        pools = self.reusable_pools(context, user_input)
+        if pools is not None:
+            # Still in the same place: sample its pools again instead of asking for new ones
+            frame_data["scene_context"]["scene_pools"] = pools
+            self.populate_scene(frame_data["scene_context"])
+            self.check_for_new_location(user_input)
+            return
 
         # Generate scene pools
-        try:
-            pools_response = openai.ChatCompletion.create(
+        def request():
+            pools_response = model_client.complete(
                 model="gpt-3.5-turbo",
                 messages=[{
                     "role": "system", 
@@ -231,44 +599,42 @@ Only include period-appropriate items and characters for 1897."""
                 max_tokens=200,
                 temperature=0.7
             )
-            
+            return pools_response
+
+        self.run_request(request, lambda content: self.apply_scene_pools(user_input, frame_data, content))
+
+    def apply_scene_pools(self, user_input, frame_data, content):
+        try:
             # Parse response and validate structure
-            pools = json.loads(pools_response.choices[0].message['content'])
+            pools = json.loads(content)
             if not all(key in pools for key in ["item_pool", "npc_pool"]):
                 raise ValueError("Missing required pool categories")
                 
             frame_data["scene_context"]["scene_pools"] = pools
-            self.save_frame(json.dumps(frame_data, indent=4))
+            self.state.frame_store.mark_dirty()
             
         except json.JSONDecodeError as e:
             print(f"JSON parse error in pools: {str(e)}")
             # Use default pools
-            frame_data["scene_context"]["scene_pools"] = {
-                "item_pool": {
-                    "common": ["stick", "stone", "leaf"],
-                    "uncommon": [],
-                    "rare": []
-                },
-                "npc_pool": {
-                    "common": ["traveler"],
-                    "uncommon": [],
-                    "rare": []
-                }
-            }
+            frame_data["scene_context"]["scene_pools"] = copy.deepcopy(DEFAULT_SCENE_POOLS)
         except Exception as e:
             print(f"Error generating scene pools: {str(e)}")
 
+        self.populate_scene(frame_data["scene_context"])
+        self.check_for_new_location(user_input)
+
+    def check_for_new_location(self, user_input):
         # Step B: Example check for new location, e.g., user finds a shop
         if "find a shop" in user_input.lower() or "come across a small general store" in user_input.lower():
             new_location_desc = "A small general store nestled amongst the trees."
             self.store_location(new_location_desc)
-            self.ui.text_widget.insert(tk.END, f"Location updated: {new_location_desc}\n", "game_text")
+            self.output.text(f"Location updated: {new_location_desc}\n")
 
         # ...rest of existing code...
 
     def extract_npcs_from_scene(self, scene_text):
         """Extract NPCs mentioned in scene description"""
-        response = openai.ChatCompletion.create(
+        response = model_client.complete(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": """Extract any characters/NPCs from the scene.
@@ -285,19 +651,18 @@ Only include period-appropriate items and characters for 1897."""
         )
         
         try:
-            npcs = json.loads(response.choices[0].message['content'])
+            npcs = json.loads(response)
             # Update scene context with active NPCs
             frame_data = self.load_frame()
             frame_data["scene_context"]["active_npcs"] = npcs
-            self.save_frame(json.dumps(frame_data))
+            self.state.frame_store.mark_dirty()
             return npcs
         except:
             return []
 
     def extract_npc_from_scene(self):
         """Extract NPC type from user input or scene"""
-        last_index = self.ui.text_widget.index("end-2c linestart")
-        last_lines = self.ui.text_widget.get("end-50c linestart", last_index).lower()
+        last_lines = self.output.recent_text(50).lower()
         
         # Map specific mentions to NPC types
         npc_mappings = {
@@ -319,45 +684,74 @@ Only include period-appropriate items and characters for 1897."""
         return None
 
     def generate_npc_encounter(self, npc_type=None):
-        """Generate a contextually appropriate NPC"""
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": f"""Generate an NPC appropriate for the Appalachian Trail in 1897.
-                Type requested: {npc_type if npc_type else 'any appropriate type'}
-                Format as JSON:
-                {{
-                    "name": "character name",
-                    "type": "{npc_type if npc_type else 'type'}",
-                    "description": "brief physical description",
-                    "personality": "key traits",
-                    "dialogue_style": "how they speak",
-                    "inventory": {{"item": [quantity, price]}} # only for vendors
-                }}"""},
-                {"role": "user", "content": "Generate a historically accurate character"}
-            ]
-        )
-        
+        """Generate a contextually appropriate NPC, or meet one of that type already on the trail"""
+        if npc_type:
+            known = self.state.npc_journal.ids_of_type(npc_type)
+            # Like get_random_npc, usually someone already met; pool_rng keeps seeded runs reproducible
+            if known and self.pool_rng.random() < 0.7:
+                npc_id = self.pool_rng.choice(known)
+                try:
+                    self.introduce_npc(self.state.npc_journal.npcs[npc_id], npc_id)
+                    return
+                except KeyError:
+                    self.state.set_current_npc(None)  # A record saved without its details; make someone new
+
+        def request():
+            return model_client.complete(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": f"""Generate an NPC appropriate for the Appalachian Trail in 1897.
+                    Type requested: {npc_type if npc_type else 'any appropriate type'}
+                    Format as JSON:
+                    {{
+                        "name": "character name",
+                        "type": "{npc_type if npc_type else 'type'}",
+                        "description": "brief physical description",
+                        "personality": "key traits",
+                        "dialogue_style": "how they speak",
+                        "inventory": {{"item": [quantity, price]}} # only for vendors
+                    }}"""},
+                    {"role": "user", "content": "Generate a historically accurate character"}
+                ]
+            )
+
+        self.run_request(request, self.show_npc_encounter)
+
+    def show_npc_encounter(self, response):
         try:
-            npc_data = json.loads(response.choices[0].message['content'])
-            self.state.current_npc = npc_data
+            npc_data = json.loads(response)
             
             # Save new NPC to game_characters.json
+            npc_id = None
             if npc_data.get("name"):  # Only save if valid NPC generated
-                self.state.save_npc(npc_data)
-            
-            encounter_msg = f"A {npc_data['type']} is encountered. {npc_data['name']}, {npc_data['description']}\n"
-            if npc_data['type'] == 'vendor':
-                items = [f"{item} ({qty} available, {price} coins)" 
-                        for item, (qty, price) in npc_data.get('inventory', {}).items()]
-                if items:
-                    encounter_msg += f"They have: {', '.join(items)}\n"
-            
-            self.ui.text_widget.insert(tk.END, encounter_msg + 
-                "You can talk naturally with them. Say 'goodbye' to end the conversation.\n", "game_text")
-            
+                npc_id = self.state.save_npc(npc_data)
+            self.introduce_npc(npc_data, npc_id)
         except (json.JSONDecodeError, KeyError):
-            self.ui.text_widget.insert(tk.END, "No one responds.\n", "game_text")
+            self.output.text("No one responds.\n")
+
+    def introduce_npc(self, npc_data, npc_id):
+        """Start an encounter with a new or returning NPC and describe them"""
+        if npc_id is not None:
+            self.meet_npc(npc_data, npc_id)
+        else:
+            self.state.set_current_npc(npc_data)
+        encounter_msg = f"A {npc_data['type']} is encountered. {npc_data['name']}, {npc_data['description']}\n"
+        if npc_data['type'] == 'vendor':
+            items = [f"{item} ({qty} available, {price} coins)" 
+                    for item, (qty, price) in npc_data.get('inventory', {}).items()]
+            if items:
+                encounter_msg += f"They have: {', '.join(items)}\n"
+        
+        self.output.text(encounter_msg + 
+            "You can talk naturally with them. Say 'goodbye' to end the conversation.\n")
+
+    def meet_npc(self, npc, npc_id):
+        """Talk to an NPC from the journal, and note that they can be found at this place again"""
+        self.state.set_current_npc(npc, npc_id)
+        node_id = self.load_frame().get("scene_context", {}).get("node")
+        node = self.state.location_graph.nodes.get(node_id)
+        if node is not None and npc_id not in node.get("npcs", ()):
+            self.state.location_graph.update(node_id, {"npcs": node.get("npcs", []) + [npc_id]})
 
     def talk_to_npc(self, user_input):
         """Handle conversation with current NPC"""
@@ -370,70 +764,131 @@ Only include period-appropriate items and characters for 1897."""
             lower_input = user_input.lower()
             for npc in scene_npcs:
                 if npc["name"].lower() in lower_input or npc["type"].lower() in lower_input:
-                    self.state.current_npc = npc
-                    self.ui.text_widget.insert(tk.END, 
-                        f"You approach {npc['name']}, {npc['description']}\n", "game_text")
-                    self.ui.text_widget.insert(tk.END, 
-                        "You can talk naturally. Say 'goodbye' to end conversation.\n", "game_text")
+                    self.state.set_current_npc(npc)
+                    self.output.text(
+                        f"You approach {npc['name']}, {npc['description']}\n")
+                    self.output.text(
+                        "You can talk naturally. Say 'goodbye' to end conversation.\n")
                     return
-                    
-            self.ui.text_widget.insert(tk.END, "There's no one here to talk to.\n", "game_text")
+
+            # Someone already met at this place, asked for by name
+            target = lower_input.replace("/talk", "", 1).strip()
+            if target.startswith("to "):
+                target = target[3:].strip()
+            node = self.state.location_graph.nodes.get(frame_data["scene_context"].get("node"))
+            if target and node is not None:
+                for npc_id in reversed(self.state.npc_journal.ids_named(target)):
+                    if npc_id in node.get("npcs", ()):
+                        npc = self.state.npc_journal.npcs[npc_id]
+                        self.meet_npc(npc, npc_id)
+                        self.output.text(f"You find {npc['name']} again. Say 'goodbye' to end conversation.\n")
+                        return
+
+            # Someone the scene's npc_pool rolled for this place
+            npc_type = frame_data["scene_context"].pop("encounter", None)
+            if npc_type:
+                self.state.frame_store.mark_dirty()
+                self.generate_npc_encounter(npc_type)
+                return
+
+            self.output.text("There's no one here to talk to.\n")
             return
             
         # Check for conversation exit
         if any(word in user_input.lower() for word in ["goodbye", "bye", "leave", "farewell"]):
             npc_name = self.state.current_npc['name']
-            self.state.current_npc = None
-            self.ui.text_widget.insert(tk.END, f"{npc_name} bids farewell.\n", "game_text")
+            self.state.set_current_npc(None)
+            self.output.text(f"{npc_name} bids farewell.\n")
             return
 
         npc = self.state.current_npc
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": f"""You are {npc['name']}, a {npc['type']} on the Appalachian Trail in 1897.
-                Personality: {npc['personality']}
-                Speaking style: {npc['dialogue_style']}
-                ONLY respond in character with dialogue.
-                No scene descriptions or narrative text.
-                If the traveler says goodbye, acknowledge it politely."""},
-                {"role": "user", "content": user_input}
-            ],
-            max_tokens=100,
-            temperature=0.7
-        )
-        
-        reply = response.choices[0].message['content'].strip()
-        self.ui.text_widget.insert(tk.END, f"{npc['name']}: {reply}\n", "game_text")
+        npc_id = self.state.current_npc_id
+        system_prompt = f"""You are {npc['name']}, a {npc['type']} on the Appalachian Trail in 1897.
+            Personality: {npc['personality']}
+            Speaking style: {npc['dialogue_style']}
+            ONLY respond in character with dialogue.
+            No scene descriptions or narrative text.
+            If the traveler says goodbye, acknowledge it politely."""
+        messages = self.conversation_memory.build_messages(npc, system_prompt, user_input)
+
+        if self.streaming:
+            self.run_stream(
+                lambda: model_client.stream(model="gpt-3.5-turbo", messages=messages, max_tokens=100, temperature=0.7),
+                StreamRenderer(self.output, prefix=f"{npc['name']}: ", clean=False),
+                lambda content, shown: self.remember_exchange(npc, npc_id, user_input, content))
+            return
+
+        def request():
+            response = model_client.complete(
+                model="gpt-3.5-turbo",
+                messages=messages,
+                max_tokens=100,
+                temperature=0.7
+            )
+            return response
+
+        def show_reply(content):
+            reply = content.strip()
+            self.output.text(f"{npc['name']}: {reply}\n")
+            self.remember_exchange(npc, npc_id, user_input, content)
+
+        self.run_request(request, show_reply)
+
+    def remember_exchange(self, npc, npc_id, user_input, reply):
+        """
+        Add an exchange to the NPC's memory, saved to the journal under npc_id (None if the NPC
+        isn't in it); older turns are summarized in the background
+        """
+        folded = self.conversation_memory.record(npc, user_input, reply.strip())
+        if npc_id is not None:
+            self.state.npc_journal.update(npc_id, {"memory": npc["memory"]})
+        if not folded:
+            return
+        messages = self.conversation_memory.summary_messages(npc, folded)
+        request = self.or_none(
+            lambda: model_client.complete(model="gpt-3.5-turbo", messages=messages, max_tokens=120, temperature=0.3),
+            f"summarizing conversation with {npc['name']}")
+
+        def apply_summary(content):
+            self.conversation_memory.apply_summary(npc, content, folded)
+            if npc_id is not None:
+                self.state.npc_journal.update(npc_id, {"memory": npc["memory"]})
+
+        self.run_request(request, apply_summary, background=True)
 
     def buy_item(self, item_name):
         """Handle purchasing items from vendors"""
         if not self.state.current_npc or self.state.current_npc['type'] != 'vendor':
-            self.ui.text_widget.insert(tk.END, "There's no vendor here to buy from.\n", "game_text")
+            self.output.text("There's no vendor here to buy from.\n")
             return
 
         npc = self.state.current_npc
         if item_name not in npc['inventory']:
-            self.ui.text_widget.insert(tk.END, f"{npc['name']} doesn't have that item for sale.\n", "game_text")
+            self.output.text(f"{npc['name']} doesn't have that item for sale.\n")
             return
 
         quantity, price = npc['inventory'][item_name]
         if quantity <= 0:
-            self.ui.text_widget.insert(tk.END, f"{npc['name']} is out of {item_name}.\n", "game_text")
+            self.output.text(f"{npc['name']} is out of {item_name}.\n")
             return
 
         if self.state.money < price:
-            self.ui.text_widget.insert(tk.END, f"You don't have enough money. {item_name} costs {price} coins.\n", "game_text")
+            self.output.text(f"You don't have enough money. {item_name} costs {price} coins.\n")
             return
 
         # Complete the purchase
         self.state.money -= price
         npc['inventory'][item_name][0] -= 1
-        self.state.inventory[item_name] = self.state.inventory.get(item_name, 0) + 1
-        
-        self.ui.text_widget.insert(tk.END, 
-            f"You bought {item_name} for {price} coins. You have {self.state.money} coins remaining.\n", "game_text")
-        self.ui.update_inventory_display()
+        with self.inventory_transaction() as transaction:
+            transaction.add(item_name)
+        npc_id = self.state.current_npc_id
+        if npc_id is not None:
+            # Keep the vendor's stock in the journal; a fair trade sits well with them
+            self.state.npc_journal.update(npc_id, {"inventory": npc["inventory"]})
+            self.update_npc_disposition(npc_id, 1)
+
+        self.output.text(
+            f"You bought {item_name} for {price} coins. You have {self.state.money} coins remaining.\n")
 
     def extract_mentioned_items(self, text):
         """Extract items that the user is trying to collect from their message"""
@@ -445,36 +900,44 @@ Only include period-appropriate items and characters for 1897."""
         for i, word in enumerate(text_words):
             if word in collection_verbs and i < len(text_words) - 1:
                 # Look at the next few words for potential items
-                potential_item = " ".join(text_words[i+1:i+4])
-                # Check against known item patterns
-                for base_item, variants in self.state.item_patterns.items():
-                    if any(variant in potential_item for variant in [base_item] + variants):
+                for potential_item in text_words[i+1:i+4]:
+                    base_item = self.state.lexicon.canonical(potential_item) or self.state.lexicon.category(potential_item)
+                    if base_item:
                         mentioned_items.add(base_item)
         
         return mentioned_items
 
-    def pickup_item(self, item_name, collect_all=True):  # Changed default to True
-        """Handle the pickup command with automatic collection of all items"""
+    def inventory_transaction(self):
+        """Group inventory changes; committing shows them as one inventory_diff event and queues them for autosave"""
+        def committed(changes):
+            self.state.save_store.mark_dirty("inventory")
+            self.output.inventory_diff(changes)
+        return InventoryTransaction(self.state.inventory, committed)
+
+    def pickup_item(self, item_name, collect_all=True, transaction=None):  # Changed default to True
+        """
+        Handle the pickup command with automatic collection of all items.
+        Pass a transaction to batch several pickups into one inventory update.
+        """
+        if transaction is None:
+            with self.inventory_transaction() as transaction:
+                self.pickup_item(item_name, collect_all, transaction)
+            return
+
         if not item_name:
-            self.ui.text_widget.insert(tk.END, "What would you like to pick up?\n", "game_text")
+            self.output.text("What would you like to pick up?\n")
             return
 
         # Try to find the exact item or a similar one
-        target_item = None
-        if item_name in self.state.environment_items:
-            target_item = item_name
-        else:
-            similar_item = self.find_similar_item(item_name, self.state.environment_items)
-            if similar_item:
-                target_item = similar_item
+        target_item = self.find_similar_item(item_name, self.state.environment_items)
 
         if not target_item:
-            self.ui.text_widget.insert(tk.END, 
-                f"There is no {item_name} or anything similar here to pick up.\n", "game_text")
+            self.output.text(
+                f"There is no {item_name} or anything similar here to pick up.\n")
             return
 
         if not self.is_item_pickable(target_item):
-            self.ui.text_widget.insert(tk.END, f"You cannot pick up the {target_item}.\n", "game_text")
+            self.output.text(f"You cannot pick up the {target_item}.\n")
             return
 
         # Get quantity to collect
@@ -482,7 +945,7 @@ Only include period-appropriate items and characters for 1897."""
         quantity_to_collect = available_quantity if collect_all else 1
 
         # Add to inventory
-        self.state.inventory[target_item] = self.state.inventory.get(target_item, 0) + quantity_to_collect
+        transaction.add(target_item, quantity_to_collect)
         
         # Remove from environment
         if collect_all:
@@ -494,9 +957,9 @@ Only include period-appropriate items and characters for 1897."""
         
         # Display appropriate message
         if quantity_to_collect > 1:
-            self.ui.text_widget.insert(tk.END, f"You picked up {quantity_to_collect} {target_item}s.\n", "game_text")
+            self.output.text(f"You picked up {quantity_to_collect} {target_item}s.\n")
         else:
-            self.ui.text_widget.insert(tk.END, f"You picked up a {target_item}.\n", "game_text")
+            self.output.text(f"You picked up a {target_item}.\n")
         
         # Add extra detail about item uses when picked up
         if target_item in self.state.environment_items:
@@ -511,31 +974,30 @@ Only include period-appropriate items and characters for 1897."""
             
             for keyword, hint in usage_hints.items():
                 if keyword in target_item.lower():
-                    self.ui.text_widget.insert(tk.END, f"This {hint}.\n", "game_text")
+                    self.output.text(f"This {hint}.\n")
                     break
 
-        self.ui.update_inventory_display()
-
     def loot_all_items(self):
         if not self.state.environment_items:
-            self.ui.text_widget.insert(tk.END, "There are no items to loot.\n", "game_text")
+            self.output.text("There are no items to loot.\n")
             return
         
         # Record items and their quantities first
         items_looted = [(item, self.state.environment_items[item]) for item in self.state.environment_items.keys()]
 
-        # Pick up everything
-        for item_name in list(self.state.environment_items.keys()):
-            self.pickup_item(item_name, collect_all=True)
+        # Pick up everything, with one inventory update at the end
+        with self.inventory_transaction() as transaction:
+            for item_name in list(self.state.environment_items.keys()):
+                self.pickup_item(item_name, collect_all=True, transaction=transaction)
 
         # Summarize looted items
         summary = ", ".join(f"{qty} {name}" for name, qty in items_looted)
-        self.ui.text_widget.insert(tk.END, f"You looted: {summary}\n", "game_text")
-        self.ui.text_widget.insert(tk.END, "All items in the scene have been looted.\n", "game_text")
+        self.output.text(f"You looted: {summary}\n")
+        self.output.text("All items in the scene have been looted.\n")
 
     def generate_scene_items(self, scene_description):
         """Generate contextual items based on scene description"""
-        response = openai.ChatCompletion.create(
+        response = model_client.complete(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": """Analyze the scene and list items that could be picked up.
@@ -557,11 +1019,13 @@ Only include period-appropriate items and characters for 1897."""
                 {"role": "user", "content": f"List collectable items from this scene: {scene_description}"}
             ],
             max_tokens=150,
-            temperature=0.7
+            temperature=0.7,
+            cache=True,  # Revisited scenes have identical descriptions
+            cache_if=self.is_json
         )
 
         try:
-            items_data = json.loads(response.choices[0].message['content'])
+            items_data = json.loads(response)
             # Merge all categories into one dictionary
             all_items = {}
             for category in items_data.values():
@@ -591,14 +1055,14 @@ Only include period-appropriate items and characters for 1897."""
             else:
                 found_items.append(f"{qty} {item}" if qty > 1 else item)
 
-        self.ui.text_widget.insert(tk.END, "\nIn this area:\n", "game_text")
+        self.output.text("\nIn this area:\n")
         
         if natural_items:
-            self.ui.text_widget.insert(tk.END, "Natural items: " + ", ".join(natural_items) + "\n", "game_text")
+            self.output.text("Natural items: " + ", ".join(natural_items) + "\n")
         if found_items:
-            self.ui.text_widget.insert(tk.END, "Found items: " + ", ".join(found_items) + "\n", "game_text")
+            self.output.text("Found items: " + ", ".join(found_items) + "\n")
         if valuable_items:
-            self.ui.text_widget.insert(tk.END, "Valuable items: " + ", ".join(valuable_items) + "\n", "game_text")
+            self.output.text("Valuable items: " + ", ".join(valuable_items) + "\n")
 
     def show_environment(self):
         # ...existing code...
@@ -608,86 +1072,39 @@ Only include period-appropriate items and characters for 1897."""
         if items:
             item_list = ", ".join(f"{qty} {item}" if qty > 1 else item 
                                 for item, qty in items.items())
-            self.ui.text_widget.insert(tk.END, 
-                f"Noticeable items in the area: {item_list}\n", "game_text")
+            self.output.text(
+                f"Noticeable items in the area: {item_list}\n")
         
         self.state.environment_items = items
-        self.ui.text_widget.see(tk.END)
 
     def extract_items(self, description):
         """Extract items from environment description more effectively"""
-        item_patterns = {
-            "stick": ["stick", "branch", "twig", "wood"],
-            "stone": ["stone", "rock", "pebble", "boulder"],
-            "herb": ["herb", "plant", "flower"],
-            "berry": ["berry", "berries", "fruit"],
-            "mushroom": ["mushroom", "fungi", "fungus"],
-            "vine": ["vine", "creeper", "rope"],
-            "leaf": ["leaf", "leaves", "foliage"],
-            "root": ["root", "roots"],
-            "bark": ["bark"]
-        }
-        
         found_items = {}
-        desc_lower = description.lower()
+        desc_words = description.lower().split()
         
         # First check for explicit mentions with quantities
         quantity_words = ['several', 'few', 'many', 'some', 'scattered', 'numerous']
         
-        for base_item, variants in item_patterns.items():
-            for variant in [base_item] + variants:
-                # Check for explicit mentions with quantities
-                for qty_word in quantity_words:
-                    if f"{qty_word} {variant}" in desc_lower:
-                        found_items[base_item] = 3  # Multiple items found
-                        break
-                
-                # Check for single items
-                if any(f"a {variant}" in desc_lower or f"the {variant}" in desc_lower):
-                    found_items[base_item] = 1
-                    
-                # Check for plural forms
-                if variant + "s" in desc_lower:
-                    found_items[base_item] = 2
+        for i, word in enumerate(desc_words):
+            base_item = self.state.lexicon.canonical(word)
+            if not base_item:
+                continue
+            if i > 0 and desc_words[i - 1] in quantity_words:
+                quantity = 3  # Multiple items found
+            elif self.state.lexicon.normalize(word) != word.strip(".,;:!?"):
+                quantity = 2  # Plural form
+            else:
+                quantity = 1
+            found_items[base_item] = max(found_items.get(base_item, 0), quantity)
         
         return found_items
 
     def find_similar_item(self, target_item, scene_items):
         """Find similar items that could be picked up"""
-        similar_items = {
-            "stick": ["branch", "twig", "wood"],
-            "stone": ["rock", "pebble", "boulder"],
-            "herb": ["plant", "flower"],
-            "berry": ["berries", "fruit"],
-            "mushroom": ["fungi", "fungus"],
-            "vine": ["creeper", "rope"],
-            "wood": ["log", "timber", "stick"],
-            "leaf": ["leaves", "foliage"],
-            "root": ["roots", "tuber"],
-            "bark": ["tree bark", "bark pieces"]
-        }
-        
-        # Convert target_item to singular form if plural
-        if target_item.endswith('s'):
-            target_item = target_item[:-1]
-        
-        # First check if the target item exists as a key in scene_items
-        if target_item in scene_items:
-            return target_item
-            
-        # Then check for similar items
-        for base_item, variants in similar_items.items():
-            if target_item in [base_item] + variants:
-                # Check if base item or any variant is in the scene
-                available_items = [item for item in [base_item] + variants 
-                                if item in scene_items]
-                if available_items:
-                    return available_items[0]
-                    
-        return None
+        return self.state.lexicon.find_in(target_item, scene_items)
 
     def hunt_animal(self):
-        response = openai.ChatCompletion.create(
+        response = model_client.complete(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": """Describe a hunting attempt in the wilderness.
@@ -700,16 +1117,15 @@ Only include period-appropriate items and characters for 1897."""
             max_tokens=50,
             temperature=0.7
         )
-        hunting_description = self.clean_response(response.choices[0].message['content'])
-        self.ui.text_widget.insert(tk.END, f"{hunting_description}\n", "game_text")
-        self.ui.text_widget.see(tk.END)
+        hunting_description = self.clean_response(response)
+        self.output.text(f"{hunting_description}\n")
         if "success" in hunting_description.lower():
             food_gain = 30
             self.state.energy = min(100, self.state.energy + food_gain)
-            self.ui.food_label.config(text=f"Energy: {self.state.energy}")
+            self.output.stats(self.state.health, self.state.energy)
 
-    def craft_item(self, item_name):
-        """Handle crafting with smart validation"""
+    def craft_item(self, item_name, auto=False):
+        """Handle crafting with smart validation; auto crafts any missing intermediate items too"""
         # Clean item name
         item_name = item_name.lower().strip()
         
@@ -722,8 +1138,8 @@ Only include period-appropriate items and characters for 1897."""
 
         # Check if item is obviously impossible
         if any(word in item_name for word in impossible_items):
-            self.ui.text_widget.insert(tk.END, 
-                f"'{item_name}' cannot be crafted with 1897 technology and available materials.\n", "game_text")
+            self.output.text(
+                f"'{item_name}' cannot be crafted with 1897 technology and available materials.\n")
             return
 
         # List of basic materials that can be used in crafting
@@ -737,63 +1153,111 @@ Only include period-appropriate items and characters for 1897."""
         if item_name not in self.state.crafting_recipes:
             # Check if it's too short or lacks meaning
             if len(item_name) < 3 or item_name in ["the", "and", "but", "for"]:
-                self.ui.text_widget.insert(tk.END, "Please specify a valid item to craft.\n", "game_text")
+                self.output.text("Please specify a valid item to craft.\n")
                 return
 
-            self.ui.text_widget.insert(tk.END, 
-                f"Attempting to devise a way to craft '{item_name}' using available materials...\n", "game_text")
-            recipe = self.state.generate_crafting_recipe(item_name)
-            
-            # Validate the recipe uses only appropriate materials
-            if recipe and all(any(material in mat for mat in basic_materials) 
-                            for material in recipe["materials"].keys()):
-                self.state.crafting_recipes[item_name] = recipe
-                self.state.save_crafting_recipes()
-                self.ui.text_widget.insert(tk.END, f"Figured out how to craft {item_name}.\n", "game_text")
+            self.output.text(
+                f"Attempting to devise a way to craft '{item_name}' using available materials...\n")
+            self.run_request(lambda: self.state.generate_crafting_recipe(item_name),
+                             lambda recipe: self.learn_recipe(item_name, recipe, basic_materials, auto))
+            return
+
+        self.finish_crafting(item_name, auto)
+
+    def learn_recipe(self, item_name, recipe, basic_materials, auto=False):
+        """Store a generated recipe if it only uses basic materials, then try crafting with it"""
+        # Validate the recipe uses only appropriate materials
+        if recipe and all(any(material in mat for mat in basic_materials) 
+                        for material in recipe["materials"].keys()):
+            self.state.add_crafting_recipe(item_name, recipe)
+            self.output.text(f"Figured out how to craft {item_name}.\n")
+        else:
+            self.output.text(
+                f"Unable to figure out how to craft '{item_name}' with available materials.\n")
+            return
+
+        self.finish_crafting(item_name, auto)
+
+    def check_materials(self, recipe):
+        """Return (missing materials, substitutions) for crafting one of recipe; the rule /craftable uses too"""
+        return self.state.crafting_index.allocate(recipe["materials"], self.state.inventory)
+
+    def use_materials(self, item_name, recipe, substitutions, transaction):
+        """Swap the materials (including substitutions) for the crafted item; raises InventoryError if short"""
+        for material, amount in recipe["materials"].items():
+            used = substitutions.get(material, material)
+            if isinstance(used, dict):
+                for name, quantity in used.items():
+                    transaction.remove(name, quantity)
             else:
-                self.ui.text_widget.insert(tk.END, 
-                    f"Unable to figure out how to craft '{item_name}' with available materials.\n", "game_text")
-                return
+                transaction.remove(used, amount)
+
+        # Add crafted item to inventory
+        transaction.add(item_name)
+
+    def finish_crafting(self, item_name, auto=False):
+        if auto:
+            self.craft_with_plan(item_name)
+            return
 
         # Continue with existing crafting logic
         recipe = self.state.crafting_recipes[item_name]
-        missing_materials = []
-        substitutions = {}
-
-        # Check for required materials or suitable substitutes
-        for material, amount in recipe["materials"].items():
-            if material in self.state.inventory and self.state.inventory[material] >= amount:
-                continue
-            
-            # Look for similar items that could be used instead
-            similar_item = self.state.find_similar_items(material)
-            if similar_item and self.state.inventory.get(similar_item, 0) >= amount:
-                substitutions[material] = similar_item
-                continue
-            
-            missing_materials.append(f"{amount} {material}")
+        missing_materials, substitutions = self.check_materials(recipe)
 
         if missing_materials:
-            self.ui.text_widget.insert(tk.END, f"You need {', '.join(missing_materials)} to craft {item_name}.\n", "game_text")
+            self.output.text(f"You need {', '.join(missing_materials)} to craft {item_name}.\n")
             return
 
-        # Use materials (including substitutions)
-        for material, amount in recipe["materials"].items():
-            actual_material = substitutions.get(material, material)
-            self.state.inventory[actual_material] -= amount
-            if self.state.inventory[actual_material] <= 0:
-                del self.state.inventory[actual_material]
+        try:
+            with self.inventory_transaction() as transaction:
+                self.use_materials(item_name, recipe, substitutions, transaction)
+        except InventoryError as e:
+            # The inventory no longer matches what check_materials allocated; nothing was used
+            self.output.text(f"You can't craft {item_name}: {e}.\n")
+            return
 
-        # Add crafted item to inventory
-        self.state.inventory[item_name] = self.state.inventory.get(item_name, 0) + 1
-        
         # Show substitutions used
         if substitutions:
-            subs_text = ", ".join(f"{orig} → {sub}" for orig, sub in substitutions.items())
-            self.ui.text_widget.insert(tk.END, f"Crafted using substitutions: {subs_text}\n", "game_text")
+            subs_text = ", ".join(f"{orig} → {' + '.join(sub) if isinstance(sub, dict) else sub}"
+                                  for orig, sub in substitutions.items())
+            self.output.text(f"Crafted using substitutions: {subs_text}\n")
         
-        self.ui.text_widget.insert(tk.END, f"You successfully crafted a {item_name}.\n", "game_text")
-        self.ui.update_inventory_display()
+        self.output.text(f"You successfully crafted a {item_name}.\n")
+
+    def craft_with_plan(self, item_name):
+        """Craft item_name along with every intermediate item it needs, in dependency order"""
+        plan = self.state.crafting_planner.plan(item_name, self.state.inventory)
+        if plan["missing"]:
+            missing = ", ".join(f"{amount} {material}" for material, amount in plan["missing"].items())
+            self.output.text(f"To craft {item_name} you still need: {missing}\n")
+            return
+
+        # The whole chain is one transaction: anything going wrong partway puts every material back
+        crafted = []
+        try:
+            with self.inventory_transaction() as transaction:
+                for step_item, count in plan["steps"]:
+                    recipe = self.state.crafting_recipes[step_item]
+                    for _ in range(count):
+                        missing_materials, substitutions = self.check_materials(recipe)
+                        if missing_materials:
+                            raise InventoryError(", ".join(missing_materials))
+                        self.use_materials(step_item, recipe, substitutions, transaction)
+                    crafted.append(f"{count} {step_item}" if count > 1 else step_item)
+        except InventoryError as e:
+            self.output.text(f"You ran short ({e}) while crafting {step_item}, so nothing was crafted.\n")
+            return
+
+        if len(crafted) > 1:
+            self.output.text(f"Crafting chain: {' → '.join(crafted)}\n")
+        self.output.text(f"You successfully crafted a {item_name}.\n")
+
+    def list_craftable_items(self):
+        craftable = self.state.get_craftable_items()
+        if not craftable:
+            self.output.text("Nothing you carry can be crafted into anything yet.\n")
+            return
+        self.output.text(f"You can craft: {', '.join(craftable)}\n")
 
     def update_game_state(self, user_input):
         # Calculate time-based energy decay
@@ -803,45 +1267,44 @@ Only include period-appropriate items and characters for 1897."""
         self.state.last_action_time = current_time
 
         # Update moves counter and affect health/energy based on action
-        if any(word in user_input.lower() for word in ['go', 'walk', 'follow', 'climb', 'hike']):
+        if self.state.action_matcher.is_movement(user_input):
             self.state.moves_since_rest += 1
             self.state.energy = max(0, self.state.energy - 2)
             if self.state.moves_since_rest > 5:
                 self.state.health = max(0, self.state.health - 5)
-                self.ui.text_widget.insert(tk.END, "You're getting tired. You should rest soon.\n", "game_text")
+                self.output.text("You're getting tired. You should rest soon.\n")
 
         if "eat" in user_input:
             if "food" in user_input.lower() or any(food in user_input.lower() for food in ["berries", "meat", "fish"]):
                 food_gain = 20
                 self.state.energy = min(100, self.state.energy + food_gain)
-                self.ui.text_widget.insert(tk.END, f"You feel less hungry.\n", "game_text")
+                self.output.text(f"You feel less hungry.\n")
             else:
-                self.ui.text_widget.insert(tk.END, "You need to specify what to eat.\n", "game_text")
+                self.output.text("You need to specify what to eat.\n")
 
         if "rest" in user_input:
             self.state.moves_since_rest = 0
             health_gain = 15
             self.state.health = min(100, self.state.health + health_gain)
             self.state.energy = max(0, self.state.energy - 5)
-            self.ui.text_widget.insert(tk.END, "You feel refreshed after resting.\n", "game_text")
+            self.output.text("You feel refreshed after resting.\n")
 
         # Check critical conditions
         if self.state.energy <= 0:
             self.state.health = max(0, self.state.health - 10)
-            self.ui.text_widget.insert(tk.END, "You are starving and losing health!\n", "game_text")
+            self.output.text("You are starving and losing health!\n")
         elif self.state.energy <= 20:
-            self.ui.text_widget.insert(tk.END, "You are getting very hungry...\n", "game_text")
+            self.output.text("You are getting very hungry...\n")
 
         if self.state.health <= 0:
-            self.ui.text_widget.insert(tk.END, "You have collapsed from exhaustion and hunger...\n", "game_text")
+            self.output.text("You have collapsed from exhaustion and hunger...\n")
 
         # Update display
-        self.ui.health_label.config(text=f"Health: {self.state.health}")
-        self.ui.energy_label.config(text=f"Energy: {self.state.energy}")
+        self.output.stats(self.state.health, self.state.energy)
 
     def extract_items_from_description(self, description):
         """Extract mentioned items from scene description and generate quantities"""
-        response = openai.ChatCompletion.create(
+        response = model_client.complete(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": """Given a scene description, identify items that could be collected.
@@ -855,18 +1318,20 @@ Only include period-appropriate items and characters for 1897."""
                 {"role": "user", "content": f"List collectable items from: {description}"}
             ],
             max_tokens=150,
-            temperature=0.7
+            temperature=0.7,
+            cache=True,
+            cache_if=self.is_json
         )
 
         try:
-            items = json.loads(response.choices[0].message['content'])
+            items = json.loads(response)
             return items
         except json.JSONDecodeError:
             return {"stick": 1}  # Fallback item
 
     def extract_scene_items(self, description):
         """Extract all potential items from scene description"""
-        response = openai.ChatCompletion.create(
+        response = model_client.complete(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": """Create a simple JSON object mapping collectible items to quantities.
@@ -879,54 +1344,66 @@ Only include period-appropriate items and characters for 1897."""
                 {"role": "user", "content": f"List collectible items from: {description}"}
             ],
             max_tokens=50,
-            temperature=0.5
+            temperature=0.5,
+            cache=True,
+            cache_if=self.is_json
         )
 
         try:
-            return json.loads(response.choices[0].message['content'])
+            return json.loads(response)
         except json.JSONDecodeError:
             return {"stick": 1}  # Fallback item
 
     def list_scene_items(self):
         if not self.state.environment_items:
-            self.ui.text_widget.insert(tk.END, "No items are available here.\n", "game_text")
+            self.output.text("No items are available here.\n")
             return
         items_list = ", ".join(self.state.environment_items.keys())
-        self.ui.text_widget.insert(tk.END, f"Pickupable items: {items_list}\n", "game_text")
+        self.output.text(f"Pickupable items: {items_list}\n")
 
     def consume_item(self, item_name):
         if item_name not in self.state.inventory or self.state.inventory[item_name] < 1:
-            self.ui.text_widget.insert(tk.END, f"You have no {item_name} to consume.\n", "game_text")
+            self.output.text(f"You have no {item_name} to consume.\n")
             return
-        self.state.inventory[item_name] -= 1
-        if self.state.inventory[item_name] <= 0:
-            del self.state.inventory[item_name]
-        self.ui.text_widget.insert(tk.END, f"You consumed a {item_name}.\n", "game_text")
-        self.ui.update_inventory_display()
+        with self.inventory_transaction() as transaction:
+            transaction.remove(item_name)
+        self.output.text(f"You consumed a {item_name}.\n")
 
     def use_item(self, item_name, usage_desc=""):
         """Handle item usage with optional AI frame adaptation and transformations."""
         if item_name not in self.state.inventory or self.state.inventory[item_name] <= 0:
-            self.ui.text_widget.insert(tk.END, f"You don't have any {item_name} to use.\n", "game_text")
+            self.output.text(f"You don't have any {item_name} to use.\n")
             return
 
         # Optional usage description -> AI frame adaptation
         if usage_desc:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": """Given the player's usage description, adapt the current game frame to reflect changes caused by item usage. Return only the updated JSON of the game_frame."""},
-                    {"role": "user", "content": f"Current frame: {json.dumps(self.load_frame(), indent=4)}\nItem used: {item_name}\nUsage description: {usage_desc}"}
-                ],
-                max_tokens=200,
-                temperature=0.7
-            )
-            updated_frame = response.choices[0].message['content'].strip()
-            self.save_frame(updated_frame)
-            self.ui.text_widget.insert(tk.END, f"You used {item_name}: {usage_desc}\n", "game_text")
-        else:
-            self.ui.text_widget.insert(tk.END, f"You use the {item_name}.\n", "game_text")
+            # Serialized here: the worker thread mustn't read the frame while the game changes it
+            frame_json = json.dumps(self.load_frame(), indent=4)
+
+            def request():
+                return model_client.complete(
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {"role": "system", "content": """Given the player's usage description, adapt the current game frame to reflect changes caused by item usage. Return only the updated JSON of the game_frame."""},
+                        {"role": "user", "content": f"Current frame: {frame_json}\nItem used: {item_name}\nUsage description: {usage_desc}"}
+                    ],
+                    max_tokens=200,
+                    temperature=0.7
+                )
 
+            def apply_usage(content):
+                self.save_frame(content.strip())
+                self.output.text(f"You used {item_name}: {usage_desc}\n")
+                self.finish_using_item(item_name)
+
+            self.run_request(request, apply_usage)
+            return
+
+        self.output.text(f"You use the {item_name}.\n")
+        self.finish_using_item(item_name)
+
+    def finish_using_item(self, item_name):
+        """Item interactions and consumption once any frame adaptation has been applied"""
         # Handle item interactions
         item_interactions = {
             "water canteen": {
@@ -953,7 +1430,7 @@ Only include period-appropriate items and characters for 1897."""
         if item_name in item_interactions:
             interaction = item_interactions[item_name]
             # ...existing code to check requirements, transform, consume, restore food, etc...
-            self.ui.text_widget.insert(tk.END, interaction["message"] + "\n", "game_text")
+            self.output.text(interaction["message"] + "\n")
             # ...existing code...
         else:
             # Default usage text already inserted above
@@ -964,22 +1441,19 @@ Only include period-appropriate items and characters for 1897."""
 
             pass
 
-        # Consume item if it's one-time use
-        self.state.inventory[item_name] -= 1
-        if self.state.inventory[item_name] <= 0:
-            del self.state.inventory[item_name]
-
-        self.ui.update_inventory_display()
+        # Consume item if it's one-time use; a queued command may already have used the last one
+        if self.state.inventory.get(item_name, 0) > 0:
+            with self.inventory_transaction() as transaction:
+                transaction.remove(item_name)
 
     def load_frame(self):
-        with open("game_frame.json", "r") as f:
-            return json.load(f)
+        """Return the live in-memory frame; call frame_store.mark_dirty() after changing it"""
+        return self.state.frame_store.data
 
     def save_frame(self, frame_str):
+        """Replace the frame with a JSON string, e.g. one rewritten by the model"""
         try:
-            data = json.loads(frame_str)
-            with open("game_frame.json", "w") as f:
-                json.dump(data, f, indent=4)
+            self.state.frame_store.replace(json.loads(frame_str))
         except:
             pass
 
@@ -987,44 +1461,48 @@ Only include period-appropriate items and characters for 1897."""
         """Update the current location in game_frame.json"""
         frame_data = self.load_frame()
         frame_data["scene_context"]["location"] = location_description
-        self.save_frame(json.dumps(frame_data))
+        self.state.frame_store.mark_dirty()
 
     def complete_goal_if_applicable(self, user_input):
         goal_reached = self.state.check_if_goal_reached(user_input)
         if goal_reached:
             self.state.progress_to_next_act()
 
-    def npc_gives_item(self, npc_name, item_name):
+    def npc_gives_item(self, npc_id, item_name):
         """
         NPC gives an item to the player. Update inventory and NPC disposition.
         """
         # ...existing code...
-        self.update_npc_disposition(npc_name, 1)
+        self.update_npc_disposition(npc_id, 1)
         # ...existing code...
 
-    def npc_requests_item(self, npc_name, item_name):
+    def npc_requests_item(self, npc_id, item_name):
         """
         NPC requests an item from the player. If player gives it, update memory.
         """
         # ...existing code...
-        self.update_npc_disposition(npc_name, 1)
+        self.update_npc_disposition(npc_id, 1)
         # ...existing code...
 
-    def npc_feeds_player(self, npc_name):
+    def npc_feeds_player(self, npc_id):
         """
         NPC feeds the player, increasing player's food and good deeds.
         """
         # ...existing code...
         self.state.energy += 15  # example
-        self.update_npc_disposition(npc_name, 2)
+        self.update_npc_disposition(npc_id, 2)
 
-    def update_npc_disposition(self, npc_name, change):
+    def update_npc_disposition(self, npc_id, change):
         """
-        Increment or decrement good/bad deeds in game_characters.json for the NPC.
+        Increment or decrement good/bad deeds in game_characters.json for the NPC with this journal id.
         """
-        # ...existing code...
-        # Load NPC data, adjust memory.good_deeds and disposition by 'change'
-        # Save updated data back to game_characters.json
+        npc = self.state.npc_journal.npcs.get(npc_id)
+        if npc is None:
+            return
+        memory = dict(npc.get("memory", {}))
+        deed = "good_deeds" if change > 0 else "bad_deeds"
+        memory[deed] = memory.get(deed, 0) + abs(change)
+        self.state.npc_journal.update(npc_id, {"memory": memory, "disposition": npc.get("disposition", 0) + change})
 
     def sleep(self):
         """
@@ -1032,30 +1510,36 @@ Only include period-appropriate items and characters for 1897."""
         """
         # Check if player has built/found shelter
         if "shelter" not in self.state.inventory and not self.is_near_shelter():
-            self.ui.text_widget.insert(tk.END, 
-                "You need a shelter to sleep safely. Try crafting one or finding a safe place.\n", "game_text")
+            self.output.text(
+                "You need a shelter to sleep safely. Try crafting one or finding a safe place.\n")
             return
             
-        self.ui.text_widget.delete("1.0", tk.END)
+        self.output.clear()
         self.state.energy = 100
         self.state.health = min(100, self.state.health + 20)  # Bonus health regeneration while sleeping
+        self.output.stats(self.state.health, self.state.energy)
         
         # Generate peaceful sleeping scene
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{
-                "role": "system",
-                "content": "Describe a peaceful night's rest in a shelter on the Appalachian Trail in 1897. Keep it to 1-2 sentences."
-            }, {
-                "role": "user",
-                "content": "Describe the scene"
-            }],
-            max_tokens=50
-        )
-        sleep_scene = self.clean_response(response.choices[0].message['content'])
-        
-        self.ui.text_widget.insert(tk.END, f"{sleep_scene}\n", "game_text")
-        self.ui.text_widget.insert(tk.END, "You feel well-rested and refreshed.\n", "game_text")
+        def request():
+            response = model_client.complete(
+                model="gpt-3.5-turbo",
+                messages=[{
+                    "role": "system",
+                    "content": "Describe a peaceful night's rest in a shelter on the Appalachian Trail in 1897. Keep it to 1-2 sentences."
+                }, {
+                    "role": "user",
+                    "content": "Describe the scene"
+                }],
+                max_tokens=50
+            )
+            return response
+
+        def show_scene(content):
+            sleep_scene = self.clean_response(content)
+            self.output.text(f"{sleep_scene}\n")
+            self.output.text("You feel well-rested and refreshed.\n")
+
+        self.run_request(request, show_scene)
         
     def is_near_shelter(self):
         """Check if player is near a natural or man-made shelter"""
@@ -1063,11 +1547,3 @@ Only include period-appropriate items and characters for 1897."""
         scene_text = frame_data.get("scene_data", "").lower()
         shelter_keywords = ["cave", "cabin", "shelter", "inn", "house", "camp", "lodge"]
         return any(keyword in scene_text for keyword in shelter_keywords)
-
-    def sleep(self):
-        """
-        Clear the chat and fully restore the character's energy.
-        """
-        self.ui.text_widget.delete("1.0", tk.END)
-        self.state.energy = 100
-        self.ui.text_widget.insert(tk.END, "You feel well-rested.\n", "game_text")
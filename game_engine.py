@@ -0,0 +1,190 @@
+from game_state import GameState
+from game_actions import GameActions
+from llm_client import model_client
+from transcript import Transcript
+
+STATS_EXPORT_PATH = "llm_calls.jsonl"
+
+HELP_TEXT = (
+    "Available commands:\n"
+    "/inventory - Check your supplies\n"
+    "/pickup [item] - Pick up an item from your surroundings\n"
+    "/loot - Pick up everything lying around\n"
+    "/items - List what can be picked up here\n"
+    "/craft [item] - Craft an item (e.g., /craft snare)\n"
+    "/craft [item] --auto - Craft an item and everything it needs along the way\n"
+    "/craftable - List what you can craft with your current supplies\n"
+    "/buy [item] - Purchase an item from a vendor\n"
+    "/talk [name] - Engage in conversation with a character, by name if you met them here before\n"
+    "/stats - Show model call latency, tokens, cache and prefetch use per call site\n"
+    "/stats export [file] - Save every recorded model call as JSON lines\n"
+    "/help - Show this help message\n\n"
+    "While talking to someone, all your messages will be directed to them.\n"
+    "Say 'goodbye' to end the conversation.\n"
+    "Every action you take will include a description of your surroundings.\n"
+)
+
+class GameOutput:
+    """
+    Everything the game shows the player, as events instead of widget calls:
+      {"type": "text", "text": ..., "tag": "game_text" | "user_input"}
+      {"type": "stats", "health": ..., "energy": ...}
+      {"type": "inventory", "items": {...}}
+      {"type": "inventory_diff", "changes": {item: new count, 0 if gone}}
+      {"type": "clear"}
+    Renderers subscribe with add_listener; events are also captured per command for headless callers.
+    """
+
+    def __init__(self, transcript):
+        self.listeners = []
+        self.capture = None  # List collecting events while GameEngine.handle runs
+        self.transcript = transcript  # Text shown so far: recent lines in memory, the rest on disk
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def emit(self, event):
+        if self.capture is not None:
+            self.capture.append(event)
+        for listener in self.listeners:
+            listener(event)
+
+    def text(self, text, tag="game_text"):
+        self.transcript.append(text, tag)
+        self.emit({"type": "text", "text": text, "tag": tag})
+
+    def stats(self, health, energy):
+        self.emit({"type": "stats", "health": health, "energy": energy})
+
+    def inventory(self, items):
+        self.emit({"type": "inventory", "items": dict(items)})
+
+    def inventory_diff(self, changes):
+        self.emit({"type": "inventory_diff", "changes": dict(changes)})
+
+    def clear(self):
+        self.transcript.forget_recent()
+        self.emit({"type": "clear"})
+
+    def recent_text(self, chars=None):
+        return self.transcript.recent_text(chars)
+
+class GameEngine:
+    """
+    The game without a display: takes player commands and produces GameOutput events.
+    Model requests run inline unless a RequestWorker is attached, in which case their
+    results arrive later through the output listeners.
+    """
+
+    def __init__(self, state=None, worker=None, transcript_path="game_transcript.jsonl"):
+        self.state = state if state is not None else GameState()
+        self.output = GameOutput(Transcript(transcript_path))
+        self.state.recent_story = self.output.recent_text  # Autosaves store the story next to the state
+        self.actions = GameActions(self.state, self.output)
+        self.worker = None
+        self.set_worker(worker)
+
+    def set_worker(self, worker):
+        self.worker = worker
+        self.actions.worker = worker
+        # Prefetches run on the worker, so without one there is nothing to take
+        self.actions.scene_prefetcher.enabled = worker is not None
+
+    @property
+    def busy(self):
+        return self.worker is not None and self.worker.busy
+
+    def handle(self, user_input):
+        """Run one command; returns the events it produced before any background request finished"""
+        self.output.capture = []
+        try:
+            self.dispatch(user_input)
+        finally:
+            events, self.output.capture = self.output.capture, None
+
+        # Write the frame once per turn; turns still waiting on the model flush when the worker goes idle
+        if not self.busy:
+            self.state.end_turn()
+        self.output.transcript.flush()
+        return events
+
+    def dispatch(self, user_input):
+        self.output.text(f"You: {user_input}\n", "user_input")
+        if user_input.startswith('/'):
+            command_parts = user_input[1:].split()
+            command = command_parts[0].lower() if command_parts else ""
+            args = command_parts[1:]
+
+            if command == "help":
+                self.output.text(HELP_TEXT)
+            elif command == "inventory":
+                self.output.inventory(self.state.inventory)
+            elif command == "pickup" and args:
+                item_name = " ".join(args)
+                self.actions.pickup_item(item_name, collect_all=False)
+            elif command == "craft":
+                item_to_craft = user_input[7:].strip()
+                auto = item_to_craft.endswith("--auto")
+                if auto:
+                    item_to_craft = item_to_craft[:-len("--auto")].strip()
+                self.actions.craft_item(item_to_craft, auto=auto)
+            elif command == "craftable":
+                self.actions.list_craftable_items()
+            elif command == "buy":
+                item_name = user_input[5:].strip()
+                self.actions.buy_item(item_name)
+            elif command == "talk":
+                self.actions.talk_to_npc(user_input)
+            elif command == "stats":
+                self.show_stats(args)
+            elif command == "loot":
+                self.actions.loot_all_items()
+            elif command == "items":
+                self.actions.list_scene_items()
+            elif command == "consume" and args:
+                item_name = " ".join(args)
+                self.actions.consume_item(item_name)
+            elif command == "use":
+                if args:
+                    item_name = args[0]
+                    usage_desc = " ".join(args[1:]) if len(args) > 1 else ""
+                    self.actions.use_item(item_name, usage_desc)
+                return
+            else:
+                self.output.text("Unknown command. Type '/help' for a list of available commands.\n")
+        else:
+            if self.actions.can_perform_action(user_input):
+                self.actions.get_response(user_input)
+            else:
+                self.output.text("Invalid action. Type '/help' for a list of available commands.\n")
+
+        self.actions.complete_goal_if_applicable(user_input)
+
+    def show_stats(self, args):
+        if args and args[0].lower() == "export":
+            path = args[1] if len(args) > 1 else STATS_EXPORT_PATH
+            count = model_client.stats.export_jsonl(path)
+            self.output.text(f"Wrote {count} model calls to {path}.\n")
+            return
+        cache = model_client.cache_stats()
+        self.output.text(model_client.stats.report())
+        self.output.text(f"Cache: {cache['memory_hits'] + cache['disk_hits']} hits, "
+                         f"{cache['misses']} misses ({cache['hit_rate']:.0%} hit rate)\n")
+        prefetch = self.actions.scene_prefetcher.summary()
+        self.output.text(f"Prefetch: {prefetch['hits']} hits, {prefetch['misses']} misses "
+                         f"({prefetch['hit_rate']:.0%} hit rate), {prefetch['wasted']} of "
+                         f"{prefetch['prefetched']} scenes unused, ~{prefetch['wasted_tokens']} tokens wasted\n")
+
+    def save_game(self):
+        # Only the recent lines: the full history lives in the transcript log
+        self.state.save_game(self.output.recent_text())
+
+    def load_game(self):
+        story = self.state.load_game()
+        if story is None:
+            self.output.text("No saved game found.\n")
+            return
+        self.output.clear()
+        self.output.text(story)
+        self.output.stats(self.state.health, self.state.energy)
+        self.output.inventory(self.state.inventory)
@@ -1,13 +1,10 @@
 import tkinter as tk
-import openai
-import os
 import time
-from dotenv import load_dotenv
-from game_state import GameState
+from collections import deque
+from game_engine import GameEngine
 from game_ui import GameUI
-from game_actions import GameActions
-
-load_dotenv(dotenv_path="config.env")
+from game_worker import RequestWorker
+from startup_timer import startup_timer
 
 class AppalachianAdventure:
     def __init__(self, root):
@@ -15,22 +12,53 @@ class AppalachianAdventure:
         self.root.title("Appalachian Trail Adventure")
         self.root.configure(bg='#2e2e2e')  # Change background color to dark grey
         
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        self.deepseek_key = os.getenv("DEEPSEEK_API_KEY")
-        openai.api_key = self.api_key
+        self.engine = GameEngine()
+        self.state = self.engine.state
+        startup_timer.mark("state + JSON loads")
+        self.ui = GameUI(root, self.engine)
+        startup_timer.mark("widgets")
         
-        self.state = GameState()
-        self.ui = GameUI(root, self.state)
-        self.actions = GameActions(self.state, self.ui)
+        # Model calls run on a background worker so the window keeps repainting;
+        # extra threads leave room for scene prefetches next to the player's own requests
+        self.worker = RequestWorker(root, max_workers=4)
+        self.worker.on_busy = self.on_worker_busy
+        self.worker.on_error = self.on_request_error
+        self.engine.set_worker(self.worker)
+        self.queued_inputs = deque()  # Commands entered while a request was still running
         
         self.ui.entry_widget.bind("<Return>", self.process_input)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         self.ui.start_game()
         self.state.last_action_time = time.time()
         
-        # Initialize first act
-        self.state.generate_new_act()
+        # Initialize first act without holding up the window
+        self.worker.warm_up(self.state.generate_new_act)
+        self.root.after_idle(self.on_ready)
+
+    def on_ready(self):
+        """Runs once the first frame is drawn and the entry accepts input"""
+        startup_timer.mark("first input ready")
+        startup_timer.report()
     
+    def on_worker_busy(self, busy):
+        self.ui.set_thinking(busy)
+        if busy:
+            return
+        self.state.end_turn()
+        # Run commands the player typed while waiting, one turn at a time
+        while not self.worker.busy and self.queued_inputs:
+            self.handle_input(self.queued_inputs.popleft())
+
+    def on_request_error(self, error):
+        print(f"Model request failed: {error}")
+        self.engine.output.text("The trail falls silent for a moment. Try again.\n")
+
+    def on_close(self):
+        self.worker.shutdown()
+        self.state.frame_store.flush()
+        self.root.destroy()
+
     def process_input(self, event):
         user_input = self.ui.entry_widget.get().strip()
         if not user_input:
@@ -38,47 +66,12 @@ class AppalachianAdventure:
         
         # Clear input box immediately after getting the text
         self.ui.entry_widget.delete(0, tk.END)
+        self.ui.skip_intro()
         
-        self.ui.text_widget.insert(tk.END, f"You: {user_input}\n", "user_input")
-        if user_input.startswith('/'):
-            command_parts = user_input[1:].split()
-            command = command_parts[0].lower()
-            args = command_parts[1:]
-
-            if command == "help":
-                self.ui.show_help()
-            elif command == "inventory":
-                self.ui.update_inventory_display()
-            elif command == "pickup" and args:
-                item_name = " ".join(args)
-                self.actions.pickup_item(item_name, collect_all=False)
-            elif command == "craft":
-                item_to_craft = user_input[7:].strip()
-                self.actions.craft_item(item_to_craft)
-            elif command == "buy":
-                item_name = user_input[5:].strip()
-                self.actions.buy_item(item_name)
-            elif command == "talk":
-                self.actions.talk_to_npc(user_input)
-            elif command == "loot":
-                self.actions.list_scene_items()
-            elif command == "consume" and args:
-                item_name = " ".join(args)
-                self.actions.consume_item(item_name)
-            elif command == "use":
-                if args:
-                    item_name = args[0]
-                    usage_desc = " ".join(args[1:]) if len(args) > 1 else ""
-                    self.actions.use_item(item_name, usage_desc)
-                return
-            else:
-                self.ui.text_widget.insert(tk.END, "Unknown command. Type '/help' for a list of available commands.\n", "game_text")
-        else:
-            if self.actions.can_perform_action(user_input):
-                self.actions.get_response(user_input)
-            else:
-                self.ui.text_widget.insert(tk.END, "Invalid action. Type '/help' for a list of available commands.\n", "game_text")
-        
-        self.actions.complete_goal_if_applicable(user_input)
-        self.ui.text_widget.see(tk.END)
+        if self.worker.busy:
+            self.queued_inputs.append(user_input)
+            return
+        self.handle_input(user_input)
 
+    def handle_input(self, user_input):
+        self.engine.handle(user_input)
@@ -1,6 +1,14 @@
 import json
-import openai  # Import the openai module
 import random  # Add this import
+from llm_client import model_client
+from crafting_index import CraftingIndex
+from crafting_planner import CraftingPlanner
+from action_matcher import ActionMatcher
+from item_lexicon import ItemLexicon
+from frame_store import FrameStore
+from npc_journal import NPCJournal
+from location_graph import LocationGraph
+from save_store import SaveStore
 
 class GameState:
     def __init__(self):
@@ -43,30 +51,33 @@ class GameState:
             "clean": ["water canteen"],
             "filter": ["cloth"],
         }
-        self.crafting_recipes = self.load_crafting_recipes()
-        
-        # Update item patterns to be more flexible
-        self.item_patterns = {
-            # Natural materials
-            "wood": ["log", "timber", "branch", "stick", "twig"],
-            "stone": ["rock", "pebble", "flint"],
-            "plant": ["herb", "flower", "grass", "weed"],
-            "berry": ["fruit", "berry", "nut", "seed"],
-            "mushroom": ["fungus", "toadstool"],
-            "vine": ["creeper", "tendril", "rope"],
-            "leaf": ["foliage", "frond", "needle"],
-            "root": ["tuber", "bulb", "rhizome"],
-            "bark": ["shell", "husk", "skin"],
-            
-            # Common found items
-            "tool": ["knife", "axe", "saw", "hammer"],
-            "container": ["bucket", "pot", "cup", "bowl"],
-            "cloth": ["fabric", "leather", "hide", "rag"],
-            "metal": ["coin", "nail", "hook", "pin"],
-            "paper": ["note", "map", "page", "letter"]
+        self.tool_actions = {
+            "bow": ["shoot", "aim", "fire"],
+            "knife": ["cut", "slice", "carve"],
+            "axe": ["chop", "split", "hack"],
+            "rope": ["tie", "bind", "secure"],
+            "fishing line": ["fish", "catch"],
         }
+        self.impossible_actions = [
+            "fly", "teleport", "swim", "dive", "build", "create", "craft"
+        ]
+        self.movement_words = ['go', 'walk', 'follow', 'climb', 'hike']
+        # Shared synonym, plural and substitute tables for every item name comparison
+        self.lexicon = ItemLexicon()
+        self.action_matcher = ActionMatcher(
+            self.action_requirements, self.tool_actions, self.impossible_actions, self.movement_words,
+            self.lexicon)
+        self.crafting_recipes = self.load_crafting_recipes()
+        self.crafting_index = CraftingIndex(self.crafting_recipes, self.lexicon)
+        self.crafting_planner = CraftingPlanner(self.crafting_recipes, self.lexicon)
+        self.frame_store = FrameStore("game_frame.json")
+        self.save_store = SaveStore()
+        self.saved_frame_changes = 0  # frame_store.changes as of the last autosave
+        self.recent_story = None  # Callable returning the story text to save with the game; set by GameEngine
+        self.location_graph = LocationGraph()  # Places already visited, for revisits without a model call
         self.npcs = self.load_npcs()
         self.current_npc = None
+        self.current_npc_id = None  # Journal id of current_npc; None for scene characters not in the journal
         self.money = 100  # Starting money
         self.current_act = None  # Current act in the game
         self.acts = []  # List of all acts
@@ -81,7 +92,7 @@ class GameState:
 
     def generate_crafting_recipe(self, item_name):
         """Generate a new crafting recipe with period-appropriate materials"""
-        response = openai.ChatCompletion.create(
+        response = model_client.complete(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": """You are an expert in 1897 wilderness survival and crafting.
@@ -96,10 +107,16 @@ class GameState:
                 {"role": "user", "content": f"Generate a realistic crafting recipe for {item_name} using only basic materials from 1897:"}
             ],
             max_tokens=150,
-            temperature=0.7
+            temperature=0.7,
+            cache=True,  # Same item always needs the same materials
+            cache_if=lambda content: self.parse_crafting_recipe(content) is not None
         )
-        
-        recipe_text = response.choices[0].message['content'].strip()
+        return self.parse_crafting_recipe(response)
+
+    @staticmethod
+    def parse_crafting_recipe(response):
+        """{"materials", "description"} from an 'item: 2 stick, 1 rope - how' reply, or None"""
+        recipe_text = response.strip()
         if recipe_text.lower() == "impossible":
             return None
             
@@ -130,29 +147,6 @@ class GameState:
                 print(f"Error parsing recipe: {e}")
         return None
 
-    def find_similar_items(self, required_item):
-        """Find similar items in inventory that could be substituted"""
-        similar_items = {
-            "stick": ["branch", "wood", "pole"],
-            "rope": ["cord", "string", "fiber", "vine"],
-            "cloth": ["fabric", "leather", "hide"],
-            "stone": ["rock", "pebble"],
-            "leather": ["hide", "skin"],
-            "fiber": ["string", "thread", "vine"],
-            "branch": ["stick", "wood", "pole"],
-            "wood": ["stick", "branch", "pole"],
-            "bone": ["antler", "tusk"]
-        }
-        
-        for category, alternatives in similar_items.items():
-            if required_item in [category] + alternatives:
-                # Check if player has any items from this category
-                available_items = [item for item in [category] + alternatives 
-                                if item in self.inventory]
-                if available_items:
-                    return available_items[0]
-        return None
-
     def load_crafting_recipes(self):
         try:
             with open("crafting_recipes.json", "r") as f:
@@ -160,76 +154,92 @@ class GameState:
         except FileNotFoundError:
             return {}
 
+    def add_crafting_recipe(self, item_name, recipe):
+        """Learn a recipe, keeping the material index in step, and persist the recipe book"""
+        self.crafting_recipes[item_name] = recipe
+        self.save_store.mark_dirty("crafting_recipes")
+        self.crafting_index.add_recipe(item_name, recipe)
+        self.crafting_planner.invalidate()
+        self.save_crafting_recipes()
+
+    def get_craftable_items(self):
+        return self.crafting_index.craftable(self.inventory)
+
     def save_crafting_recipes(self):
         with open("crafting_recipes.json", "w") as f:
             json.dump(self.crafting_recipes, f, indent=4)
 
-    def save_game(self):
-        game_state = {
+    def save_data(self):
+        return {
             "current_scene": self.current_scene,
-            "story": self.text_widget.get(1.0, tk.END),
             "health": self.health,
             "energy": self.energy,
             "inventory": self.inventory,
             "crafting_recipes": self.crafting_recipes,  # Save crafting recipes
-            "money": self.money
+            "money": self.money,
+            "frame": self.frame_store.data
         }
-        with open("game_state.json", "w") as f:
-            json.dump(game_state, f, indent=4)
-    
+
+    def save_game(self, story=""):
+        """Write a full snapshot; turns after this are saved as small deltas by autosave"""
+        self.save_store.compact(self.save_data(), story)
+
+    def end_turn(self):
+        """Persist everything a turn changed: frame, buffered NPC and location records and the save deltas"""
+        self.frame_store.flush()
+        self.npc_journal.flush()
+        self.location_graph.flush()
+        self.autosave()
+
+    def autosave(self):
+        """Append this turn's changes, once the player has saved or loaded a game this session"""
+        if self.save_store.saved is not None:
+            if self.frame_store.changes != self.saved_frame_changes:
+                self.save_store.mark_dirty("frame")
+                self.saved_frame_changes = self.frame_store.changes
+            story = self.recent_story() if self.recent_story else None
+            self.save_store.save(self.save_data(), story)
+
     def load_game(self):
-        try:
-            with open("game_state.json", "r") as f:
-                game_state = json.load(f)
-                self.current_scene = game_state["current_scene"]
-                self.text_widget.delete(1.0, tk.END)
-                self.display_text(game_state["story"], "game_text")
-                self.health = game_state["health"]
-                self.energy = game_state["energy"]
-                self.inventory = game_state["inventory"]
-                self.crafting_recipes = game_state.get("crafting_recipes", {})  # Load crafting recipes
-                self.health_label.config(text=f"Health: {self.health}")
-                self.energy_label.config(text=f"Energy: {self.energy}")
-                self.inventory_label.config(text=f"Inventory: {', '.join(self.inventory)}")
-        except FileNotFoundError:
-            self.display_text("No saved game found.\n", "game_text")
+        """Restore the saved game; returns the saved story text, or None if there is no save"""
+        saved = self.save_store.load()
+        if saved is None:
+            return None
+        game_state, story = saved
+        self.current_scene = game_state["current_scene"]
+        self.health = game_state["health"]
+        self.energy = game_state["energy"]
+        self.inventory = game_state["inventory"]
+        self.money = game_state.get("money", self.money)
+        self.crafting_recipes = game_state.get("crafting_recipes", {})  # Load crafting recipes
+        self.crafting_index.rebuild(self.crafting_recipes)
+        self.crafting_planner = CraftingPlanner(self.crafting_recipes, self.lexicon)
+        if "frame" in game_state:
+            self.frame_store.replace(game_state["frame"])
+        return story
 
     def get_available_items(self):
         """Get a list of available items in the current scene"""
         return {item: qty for item, qty in self.environment_items.items() if qty > 0}
 
     def load_npcs(self):
-        """Load NPCs from game_characters.json"""
-        try:
-            with open("game_characters.json", "r") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            # Create the file if it doesn't exist
-            with open("game_characters.json", "w") as f:
-                json.dump({}, f, indent=4)
-            return {}
+        """Load NPCs from game_characters.json plus the journal of NPCs met since the last compaction"""
+        self.npc_journal = NPCJournal("game_characters.json", "game_characters.jsonl")
+        return self.npc_journal.npcs
 
     def save_npc(self, npc_data):
-        """Save a new NPC to game_characters.json"""
-        try:
-            with open("game_characters.json", "r") as f:
-                characters = json.load(f)
-        except FileNotFoundError:
-            characters = {}
-        
-        npc_id = str(len(characters) + 1)
-        characters[npc_id] = npc_data
-        
-        with open("game_characters.json", "w") as f:
-            json.dump(characters, f, indent=4)
-        
-        return npc_id
+        """Save a new NPC by appending it to the character journal"""
+        return self.npc_journal.add(npc_data)
+
+    def set_current_npc(self, npc, npc_id=None):
+        """Start talking to npc, or end the conversation with None; memory is saved under npc_id"""
+        self.current_npc = npc
+        self.current_npc_id = npc_id if npc is not None else None
 
     def get_random_npc(self):
         """Get a random existing NPC or generate a new one"""
         if self.npcs and random.random() < 0.7:  # 70% chance to use existing NPC
-            npc_id = random.choice(list(self.npcs.keys()))
-            return self.npcs[npc_id]
+            return self.npcs[self.npc_journal.random_id()]
         else:
             return self.generate_npc()
 
@@ -237,7 +247,7 @@ class GameState:
         """Generate a new NPC using AI, optionally of a specific type"""
         type_prompt = f"of type {npc_type}" if npc_type else "that could be encountered"
         
-        response = openai.ChatCompletion.create(
+        response = model_client.complete(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": """Create a character for the Appalachian Trail in 1897.
@@ -256,7 +266,7 @@ class GameState:
         )
         
         try:
-            npc_data = json.loads(response.choices[0].message['content'])
+            npc_data = json.loads(response)
             if npc_type and npc_data['type'] != npc_type:
                 npc_data['type'] = npc_type  # Ensure correct type
             self.save_npc(npc_data)
@@ -270,7 +280,7 @@ class GameState:
         Uses AI to generate minimal story context and encounters.
         """
         act_prompt = "Generate a JSON object representing an act with a short goal and up to 3 scene ideas."
-        response = openai.ChatCompletion.create(
+        response = model_client.complete(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "You are creating acts for a text-based adventure set in 1897."},
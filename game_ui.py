@@ -1,11 +1,15 @@
 import tkinter as tk
-import time
-import json
+from collections import deque
+from llm_client import model_client
 
 class GameUI:
-    def __init__(self, root, state):
+    """Tk renderer for a GameEngine: draws its output events and forwards the buttons"""
+
+    def __init__(self, root, engine):
         self.root = root
-        self.state = state
+        self.engine = engine
+        self.state = engine.state
+        self.intro_job = None  # Pending root.after id while the intro is still playing
         
         # Create main frame with padding
         main_frame = tk.Frame(root, bg='#2e2e2e', padx=20, pady=20)
@@ -64,6 +68,17 @@ class GameUI:
         )
         self.energy_label.pack(side='left', padx=10)
         
+        # Shown while a model request is running in the background
+        self.status_label = tk.Label(
+            status_frame, 
+            text="", 
+            bg='#2e2e2e', 
+            fg='#aaaaaa',  # Light gray for status
+            font=('Consolas', 11, 'italic'),
+            width=15
+        )
+        self.status_label.pack(side='right', padx=10)
+        
         # Inventory with scrolled text widget
         inventory_frame = tk.Frame(main_frame, bg='#2e2e2e')
         inventory_frame.pack(fill='x', pady=(0, 10))
@@ -88,6 +103,9 @@ class GameUI:
             pady=5
         )
         self.inventory_text.pack(fill='x')
+        self.inventory_tags = {}  # item -> text tag covering its entry, in display order
+        self.inventory_tag_count = 0
+        self.update_inventory_display(self.state.inventory)
         
         # Button frame
         button_frame = tk.Frame(main_frame, bg='#2e2e2e')
@@ -105,11 +123,11 @@ class GameUI:
             'relief': tk.FLAT
         }
         
-        self.save_button = tk.Button(button_frame, text="Save Game", command=self.state.save_game, **button_style)
+        self.save_button = tk.Button(button_frame, text="Save Game", command=engine.save_game, **button_style)
         self.save_button.pack(side='left', padx=5)
         
-        self.load_button = tk.Button(button_frame, text="Load Game", command=self.state.load_game, **button_style)
-        self.load_button.pack(side='left', padx5)
+        self.load_button = tk.Button(button_frame, text="Load Game", command=engine.load_game, **button_style)
+        self.load_button.pack(side='left', padx=5)
         
         self.settings_button = tk.Button(button_frame, text="Settings", command=self.open_settings, **button_style)
         self.settings_button.pack(side='left', padx=5)
@@ -118,7 +136,69 @@ class GameUI:
         self.text_widget.tag_configure("user_input", foreground="white", font=('Consolas', 11, 'bold'))
         self.text_widget.tag_configure("game_text", foreground="#00ff00", font=('Consolas', 11))  # Bright green
 
-    def start_game(self):
+        # The widget only holds about transcript.max_lines lines; older ones are loaded back on scroll
+        self.transcript = engine.output.transcript
+        self.widget_lines = 0  # Finished lines currently in the widget
+        self.history_start = 0  # Transcript line number of the widget's first line
+        self.history_floor = 0  # Lines before this were cleared from the screen and stay hidden
+        self.history_page = 100  # Lines trimmed or loaded at a time
+        self.loading_history = False
+        self.text_widget.config(yscrollcommand=self.on_scroll)
+
+        engine.output.add_listener(self.render)
+
+    def render(self, event):
+        """Draw one GameOutput event"""
+        kind = event["type"]
+        if kind == "text":
+            self.text_widget.insert(tk.END, event["text"], event["tag"])
+            self.widget_lines += event["text"].count("\n")
+            self.trim_scrollback()
+            self.text_widget.see(tk.END)
+        elif kind == "stats":
+            self.health_label.config(text=f"Health: {event['health']}")
+            self.energy_label.config(text=f"Energy: {event['energy']}")
+        elif kind == "inventory":
+            self.update_inventory_display(event["items"])
+        elif kind == "inventory_diff":
+            self.apply_inventory_diff(event["changes"])
+        elif kind == "clear":
+            self.text_widget.delete("1.0", tk.END)
+            self.widget_lines = 0
+            self.history_start = self.history_floor = self.transcript.line_count
+
+    def trim_scrollback(self):
+        """Drop the oldest lines once the widget is a page over its limit, so Tk cost stays flat"""
+        excess = self.widget_lines - self.transcript.max_lines
+        if excess < self.history_page:
+            return
+        self.text_widget.delete("1.0", f"{excess + 1}.0")
+        self.widget_lines -= excess
+        self.history_start += excess
+
+    def on_scroll(self, first, last):
+        # Scrolled to the top with older history on disk: load the previous page
+        if float(first) <= 0.0 and self.history_start > self.history_floor and not self.loading_history:
+            self.loading_history = True
+            self.root.after_idle(self.load_older_history)
+
+    def load_older_history(self):
+        self.loading_history = False
+        count = min(self.history_page, self.history_start - self.history_floor)
+        lines = self.transcript.older(self.history_start, count)
+        if not lines:
+            return
+        chunks = []
+        for text, tag in lines:
+            chunks.extend((text + "\n", tag))
+        self.text_widget.insert("1.0", *chunks)
+        self.history_start -= len(lines)
+        self.widget_lines += len(lines)
+        # Keep the line the player was looking at in place
+        self.text_widget.yview(f"{len(lines) + 1}.0")
+
+    def start_game(self, line_delay=2000):
+        """Play the intro one line every line_delay ms; any key shows the rest at once"""
         intro_text = [
             "The morning mist clings to Springer Mountain as you adjust your canvas rucksack.\n",
             "Behind you lies Atlanta and your old life. Ahead stretches the Appalachian Trail - a wild and untamed path north through the mountains.\n",
@@ -127,63 +207,109 @@ class GameUI:
             "Type '/look' to observe your surroundings, '/inventory' to check your supplies, or start walking with commands like '/go north' or '/follow trail'.\n",
             "Type '/help' for a list of available commands.\n"
         ]
-        for text in intro_text:
-            self.text_widget.insert(tk.END, text, "game_text")
-            self.root.update()
-            time.sleep(2)  # Longer pause for dramatic effect
-            self.text_widget.see(tk.END)
-        self.display_scene_top()
+        self.intro_lines = deque(intro_text)
+        self.intro_delay = line_delay  # Longer pause for dramatic effect
+        self.root.bind("<Key>", lambda event: self.skip_intro())
+        self.show_intro_line()
 
-    def show_help(self):
-        help_text = (
-            "Available commands:\n"
-            "/inventory - Check your supplies\n"
-            "/pickup [item] - Pick up an item from your surroundings\n"
-            "/craft [item] - Craft an item (e.g., /craft snare)\n"
-            "/buy [item] - Purchase an item from a vendor\n"
-            "/talk - Engage in conversation with a character\n"
-            "/help - Show this help message\n\n"
-            "While talking to someone, all your messages will be directed to them.\n"
-            "Say 'goodbye' to end the conversation.\n"
-            "Every action you take will include a description of your surroundings.\n"
-        )
-        self.text_widget.insert(tk.END, help_text, "game_text")
+    def show_intro_line(self):
+        self.engine.output.text(self.intro_lines.popleft())
+        if self.intro_lines:
+            self.intro_job = self.root.after(self.intro_delay, self.show_intro_line)
+        else:
+            self.finish_intro()
+
+    def skip_intro(self):
+        if self.intro_job is None:
+            return
+        self.root.after_cancel(self.intro_job)
+        while self.intro_lines:
+            self.engine.output.text(self.intro_lines.popleft())
+        self.finish_intro()
 
-    def update_inventory_display(self):
+    def finish_intro(self):
+        self.intro_job = None
+        self.root.unbind("<Key>")
+        self.display_scene_top()
+
+    def update_inventory_display(self, items):
         self.inventory_text.delete('1.0', tk.END)
-        inventory_text = ", ".join(f"{qty} {item}" if qty > 1 else item 
-                                 for item, qty in self.state.inventory.items())
-        self.inventory_text.insert(tk.END, inventory_text)
+        for tag in self.inventory_tags.values():
+            self.inventory_text.tag_delete(tag)
+        self.inventory_tags = {}
+        for item, qty in items.items():
+            self.insert_inventory_entry(item, qty)
+
+    def inventory_label(self, item, qty):
+        return f"{qty} {item}" if qty > 1 else item
+
+    def insert_inventory_entry(self, item, qty):
+        """Append an entry under its own tag so later diffs can find and edit just that entry"""
+        tag = f"inventory{self.inventory_tag_count}"
+        self.inventory_tag_count += 1
+        if self.inventory_tags:
+            self.inventory_text.insert(tk.END, ", ")
+        self.inventory_tags[item] = tag
+        self.inventory_text.insert(tk.END, self.inventory_label(item, qty), tag)
+
+    def apply_inventory_diff(self, changes):
+        """Edit only the entries a command changed instead of rebuilding the whole panel"""
+        for item, qty in changes.items():
+            tag = self.inventory_tags.get(item)
+            if tag is None:
+                # New items go last, where the inventory dict puts them too
+                if qty > 0:
+                    self.insert_inventory_entry(item, qty)
+                continue
+            start, end = self.inventory_text.tag_ranges(tag)
+            if qty > 0:
+                self.inventory_text.delete(start, end)
+                self.inventory_text.insert(start, self.inventory_label(item, qty), tag)
+                continue
+            # Remove the entry along with the separator next to it
+            first = next(iter(self.inventory_tags)) == item
+            del self.inventory_tags[item]
+            if not first:
+                self.inventory_text.delete(f"{start} - 2c", end)
+            elif self.inventory_tags:
+                self.inventory_text.delete(start, f"{end} + 2c")
+            else:
+                self.inventory_text.delete(start, end)
+            self.inventory_text.tag_delete(tag)
+
+    def set_thinking(self, thinking):
+        self.status_label.config(text="Thinking..." if thinking else "")
 
     def open_settings(self):
         settings_window = tk.Toplevel(self.root)
         settings_window.title("Settings")
         settings_window.configure(bg='black')
+        api_key, deepseek_key = model_client.openai_backend.load_keys()
         
         tk.Label(settings_window, text="OpenAI API Key:", bg='black', fg='white').pack(pady=5)
         openai_entry = tk.Entry(settings_window, width=50, bg='black', fg='white', insertbackground='white')
         openai_entry.pack(pady=5)
-        openai_entry.insert(0, self.state.api_key)
+        openai_entry.insert(0, api_key or "")
         
         tk.Label(settings_window, text="DeepSeek API Key:", bg='black', fg='white').pack(pady=5)
         deepseek_entry = tk.Entry(settings_window, width=50, bg='black', fg='white', insertbackground='white')
         deepseek_entry.pack(pady=5)
-        deepseek_entry.insert(0, self.state.deepseek_key)
+        deepseek_entry.insert(0, deepseek_key or "")
         
         def save_keys():
-            self.state.api_key = openai_entry.get()
-            self.state.deepseek_key = deepseek_entry.get()
-            with open("config.env", "w") as f:
-                f.write(f"OPENAI_API_KEY={self.state.api_key}\n")
-                f.write(f"DEEPSEEK_API_KEY={self.state.deepseek_key}\n")
-            openai.api_key = self.state.api_key
+            api_key = openai_entry.get()
+            deepseek_key = deepseek_entry.get()
+            with open(model_client.openai_backend.env_path, "w") as f:
+                f.write(f"OPENAI_API_KEY={api_key}\n")
+                f.write(f"DEEPSEEK_API_KEY={deepseek_key}\n")
+            model_client.openai_backend.set_keys(api_key, deepseek_key)
             settings_window.destroy()
         
         save_button = tk.Button(settings_window, text="Save", command=save_keys, bg='gray', fg='white')
         save_button.pack(pady=20)
 
     def display_scene_top(self):
-        with open("game_frame.json", "r") as f:
-            data = json.load(f)
+        data = self.state.frame_store.data
         scene_text = data.get("scene_data", "")
-        self.text_widget.insert("1.0", scene_text + "\n", "game_text")
+        # Goes through the transcript like everything else, so it lands after the intro
+        self.engine.output.text(scene_text + "\n")
@@ -0,0 +1,137 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+class RequestWorker:
+    """Runs blocking model requests on a thread pool and hands results back to the Tk main loop"""
+
+    def __init__(self, root, max_workers=2, poll_interval=50):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        # (kind, payload, callback) waiting for the main thread; kind is "result", "background" or "chunk"
+        self.results = queue.Queue()
+        self.poll_interval = poll_interval  # Milliseconds between checks for finished requests
+        self.pending = 0  # Requests the player is waiting on
+        self.background = 0  # Housekeeping requests that don't make the game busy
+        self.polling = False
+        self.busy_reported = False
+
+        # Hooks set by the game: busy state changes, request errors, and after each delivered result
+        self.on_busy = None
+        self.on_error = None
+        self.on_settled = None
+
+    @property
+    def busy(self):
+        return self.pending > 0
+
+    def submit(self, request, callback):
+        """Run request() in the background, then call callback(result) on the main thread"""
+        # Counted before on_busy runs, so the hook already sees the game as busy.
+        # Follow-up requests submitted from a callback keep the existing busy state
+        self.pending += 1
+        if not self.busy_reported:
+            self.busy_reported = True
+            if self.on_busy:
+                self.on_busy(True)
+        self.run(request, callback, "result")
+
+    def submit_background(self, request, callback):
+        """Like submit, but the player can keep playing: no busy state, and failures are only logged"""
+        self.background += 1
+        self.run(request, callback, "background")
+
+    def run(self, request, callback, kind):
+        future = self.executor.submit(request)
+        # Tk isn't thread-safe, so the pool thread only queues the future; poll() runs the callback
+        future.add_done_callback(lambda f: self.results.put((kind, f, callback)))
+
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.poll_interval, self.poll)
+
+    def submit_stream(self, stream, on_chunk, callback):
+        """
+        Consume the stream() generator in the background. Chunks reach on_chunk on the main thread,
+        merged into one call per poll, then callback gets the full text.
+        """
+        def request():
+            parts = []
+            for chunk in stream():
+                parts.append(chunk)
+                self.results.put(("chunk", chunk, on_chunk))
+            return "".join(parts)
+
+        self.submit(request, callback)
+
+    def warm_up(self, request):
+        """Run request() in the background without marking the game busy; failures are only logged"""
+        def report(future):
+            if future.exception() is not None:
+                print(f"Background warm-up failed: {future.exception()}")
+
+        self.executor.submit(request).add_done_callback(report)
+
+    def poll(self):
+        """Deliver finished requests; reschedules itself with root.after while work is in flight"""
+        batch = []
+        while True:
+            try:
+                batch.append(self.results.get_nowait())
+            except queue.Empty:
+                break
+
+        for index, (kind, payload, callback) in enumerate(batch):
+            if kind == "chunk":
+                # Streamed chunk: merge runs for the same stream into one widget update
+                if payload is None:
+                    continue
+                text = [payload]
+                for later in range(index + 1, len(batch)):
+                    if batch[later][0] != "chunk" or batch[later][2] is not callback:
+                        break
+                    text.append(batch[later][1])
+                    batch[later] = ("chunk", None, callback)
+                try:
+                    callback("".join(text))
+                except Exception as e:
+                    print(f"Error rendering streamed text: {e}")
+                continue
+
+            future = payload
+            if kind == "background":
+                self.background -= 1
+                try:
+                    if future.exception() is None:
+                        callback(future.result())
+                    else:
+                        print(f"Background request failed: {future.exception()}")
+                except Exception as e:
+                    print(f"Error handling background result: {e}")
+                continue
+
+            self.pending -= 1
+            try:
+                error = future.exception()
+                if error is None:
+                    callback(future.result())
+                elif self.on_error:
+                    self.on_error(error)
+                else:
+                    print(f"Background request failed: {error}")
+            except Exception as e:
+                print(f"Error handling background result: {e}")
+
+            if self.on_settled:
+                self.on_settled()
+
+        if self.pending or self.background:
+            self.root.after(self.poll_interval, self.poll)
+        else:
+            self.polling = False
+        if not self.pending and self.busy_reported:
+            self.busy_reported = False
+            if self.on_busy:
+                self.on_busy(False)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
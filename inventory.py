@@ -0,0 +1,68 @@
+class InventoryError(Exception):
+    """Raised by InventoryTransaction.remove when there isn't enough of an item"""
+
+class InventoryTransaction:
+    """
+    A batch of inventory changes that succeed or fail together. Changes go straight into the
+    inventory dict, with each item's original count kept so rollback() can undo all of them,
+    e.g. when a crafting chain runs short partway. commit() hands the net change to on_commit
+    as one {item: new count} diff, 0 meaning the item is gone.
+    As a context manager it commits when the block finishes and rolls back if it raises.
+    """
+
+    def __init__(self, inventory, on_commit=None):
+        self.inventory = inventory
+        self.on_commit = on_commit
+        self.original = {}  # item -> count before the transaction, None if it wasn't carried
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def count(self, item):
+        return self.inventory.get(item, 0)
+
+    def remember(self, item):
+        if item not in self.original:
+            self.original[item] = self.inventory.get(item)
+
+    def add(self, item, quantity=1):
+        self.remember(item)
+        self.inventory[item] = self.count(item) + quantity
+
+    def remove(self, item, quantity=1):
+        have = self.count(item)
+        if have < quantity:
+            raise InventoryError(f"need {quantity} {item}, have {have}")
+        self.remember(item)
+        if have == quantity:
+            del self.inventory[item]
+        else:
+            self.inventory[item] = have - quantity
+
+    def diff(self):
+        return {item: self.count(item) for item, before in self.original.items()
+                if self.inventory.get(item) != before}
+
+    def commit(self):
+        """Keep the changes; returns the diff, which on_commit also receives if anything changed"""
+        changes = self.diff()
+        self.original = {}
+        if changes and self.on_commit:
+            self.on_commit(changes)
+        return changes
+
+    def rollback(self):
+        """Put every touched item back to its count from before the transaction"""
+        for item, before in self.original.items():
+            if before is None:
+                self.inventory.pop(item, None)
+            else:
+                self.inventory[item] = before
+        self.original = {}
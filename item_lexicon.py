@@ -0,0 +1,179 @@
+import re
+
+# Surface forms that mean the same item, keyed by canonical name
+ITEM_ALIASES = {
+    "stick": ["branch", "twig", "wood", "pole", "log", "timber"],
+    "stone": ["rock", "pebble"],
+    "herb": ["plant", "flower", "grass", "weed"],
+    "berry": ["fruit", "nut", "seed"],
+    "mushroom": ["fungus", "fungi", "toadstool"],
+    "vine": ["creeper", "tendril"],
+    "leaf": ["foliage", "frond"],
+    "root": ["tuber", "bulb", "rhizome"],
+    "bark": ["husk", "tree bark", "bark piece"],
+    "rope": ["cord", "string"],
+    "fiber": ["thread"],
+    "cloth": ["fabric", "rag"],
+    "leather": ["hide", "skin"],
+    "bone": ["antler", "tusk"]
+}
+
+# Canonical items that can stand in for another canonical item when crafting
+ITEM_SUBSTITUTES = {
+    "rope": ["fiber", "vine"],
+    "fiber": ["rope", "vine"],
+    "cloth": ["leather"]
+}
+
+# Broad categories the player might mention instead of a specific item
+ITEM_CATEGORIES = {
+    "tool": ["knife", "axe", "saw", "hammer"],
+    "container": ["bucket", "pot", "cup", "bowl"],
+    "metal": ["coin", "nail", "hook", "pin"],
+    "paper": ["note", "map", "page", "letter"]
+}
+
+IRREGULAR_SINGULARS = {
+    "leaves": "leaf",
+    "knives": "knife",
+    "wolves": "wolf",
+    "loaves": "loaf",
+    "halves": "half",
+    "fungi": "fungus",
+    "feet": "foot",
+    "teeth": "tooth",
+    "geese": "goose",
+    "mice": "mouse"
+}
+
+PLURALS = {singular: plural for plural, singular in IRREGULAR_SINGULARS.items()}
+
+class ItemLexicon:
+    """
+    One place to decide whether two item names mean the same thing.
+    Every known surface form (aliases, plurals) maps to a canonical name through a precomputed table,
+    so lookups are dictionary hits instead of scans over synonym lists.
+    """
+
+    def __init__(self, aliases=ITEM_ALIASES, substitutes=ITEM_SUBSTITUTES, categories=ITEM_CATEGORIES):
+        self.surface_map = {}  # normalized surface form -> canonical name
+        self.forms = {}  # canonical name -> surface forms, canonical first, with plurals
+        for canonical, names in aliases.items():
+            self.forms[canonical] = []
+            for name in [canonical] + names:
+                self.add_form(canonical, name)
+        self.substitutes = substitutes
+        self.category_map = {}  # normalized member -> category
+        for category, members in categories.items():
+            for member in members:
+                self.category_map[self.normalize(member)] = category
+        self.key_memo = {}  # Raw name -> key; item names repeat constantly
+
+    def add_form(self, canonical, name):
+        normalized = self.normalize(name)
+        self.surface_map.setdefault(normalized, canonical)
+        for form in (normalized, self.pluralize(normalized)):
+            if form not in self.forms[canonical]:
+                self.forms[canonical].append(form)
+
+    @staticmethod
+    def singularize(word):
+        if word in IRREGULAR_SINGULARS:
+            return IRREGULAR_SINGULARS[word]
+        if len(word) > 3 and word.endswith("ies"):
+            return word[:-3] + "y"
+        if word.endswith(("ches", "shes", "sses", "xes")):
+            return word[:-2]
+        if len(word) > 2 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+            return word[:-1]
+        return word
+
+    @staticmethod
+    def pluralize(phrase):
+        words = phrase.split()
+        word = words[-1]
+        if word in PLURALS:
+            word = PLURALS[word]
+        elif word.endswith("y") and not word.endswith(("ay", "ey", "oy", "uy")):
+            word = word[:-1] + "ies"
+        elif word.endswith(("ch", "sh", "ss", "x")):
+            word += "es"
+        elif not word.endswith("s"):
+            word += "s"
+        return " ".join(words[:-1] + [word])
+
+    def normalize(self, name):
+        """Lowercase, collapse whitespace and singularize the head noun: 'Wild  Berries' -> 'wild berry'"""
+        words = re.sub(r"[^a-z0-9\s-]", " ", name.lower()).split()
+        if not words:
+            return ""
+        words[-1] = self.singularize(words[-1])
+        return " ".join(words)
+
+    def canonical(self, name):
+        """Canonical name for a known item, trying the whole phrase then its head noun; None if unknown"""
+        normalized = self.normalize(name)
+        if normalized in self.surface_map:
+            return self.surface_map[normalized]
+        head = normalized.rsplit(" ", 1)[-1]
+        return self.surface_map.get(head)
+
+    def key(self, name):
+        """
+        Comparison key for any item name: its canonical name when known, otherwise its singular
+        head noun, so 'rusted knife' and 'knife' compare equal.
+        """
+        key = self.key_memo.get(name)
+        if key is None:
+            key = self.canonical(name)
+            if key is None:
+                key = self.normalize(name).rsplit(" ", 1)[-1]
+            self.key_memo[name] = key
+        return key
+
+    def category(self, name):
+        normalized = self.normalize(name)
+        return self.category_map.get(normalized) or self.category_map.get(normalized.rsplit(" ", 1)[-1])
+
+    def same_item(self, first, second):
+        return self.key(first) == self.key(second)
+
+    def substitute_keys(self, material):
+        """Keys of items that can be used for material when crafting, its own key first"""
+        key = self.key(material)
+        return [key] + [substitute for substitute in self.substitutes.get(key, []) if substitute != key]
+
+    def find_in(self, name, items, keys=None):
+        """
+        Return the entry in items that name refers to, or None.
+        Tries the exact name, then every known surface form of its key, then compares keys of the entries.
+        keys limits the match to those item keys (defaults to name's own key).
+        """
+        if name in items and (keys is None or self.key(name) in keys):
+            return name
+        keys = keys or [self.key(name)]
+        for key in keys:
+            for form in self.forms.get(key, (key,)):
+                if form in items:
+                    return form
+        # Entries with adjectives ("smooth stone") only match by key
+        for key in keys:
+            for item in items:
+                if self.key(item) == key:
+                    return item
+        return None
+
+    def find_with_quantity(self, name, items, amount, keys=None):
+        """Like find_in, but only returns an entry with at least amount available"""
+        keys = keys or [self.key(name)]
+        if items.get(name, 0) >= amount and self.key(name) in keys:
+            return name
+        for key in keys:
+            for form in self.forms.get(key, (key,)):
+                if items.get(form, 0) >= amount:
+                    return form
+        for key in keys:
+            for item, quantity in items.items():
+                if quantity >= amount and self.key(item) == key:
+                    return item
+        return None
@@ -0,0 +1,102 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+
+def atomic_write(path, data):
+    """
+    Replace path with data (str or bytes) through a temporary file in the same directory and a
+    rename, so a crash leaves either the old file or the new one, never half of each.
+    Raises OSError for the caller to report.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def read_records(path):
+    """Yield each record of a JSON-lines file; a missing file has none"""
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append can leave a partial last line; skip it
+                    print(f"Skipping corrupt record in {path}")
+    except FileNotFoundError:
+        return
+
+class JsonlJournal:
+    """
+    Append-only JSON-lines log of changes to an in-memory store, replayed on load.
+    Records are buffered until flush(), called once per turn, which writes them in one append
+    and compacts once should_compact() says the log has grown enough. Subclasses apply records
+    to their own data and decide what compact() rewrites the log (or a snapshot) as.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.records = 0  # Records in the log file
+        self.pending = []  # Records not yet written
+        atexit.register(self.flush)
+
+    def replay(self):
+        """Apply every record in the log, in order"""
+        self.records = 0
+        for record in read_records(self.path):
+            self.apply(record)
+            self.records += 1
+
+    def apply(self, record):
+        raise NotImplementedError
+
+    def append_record(self, record):
+        self.pending.append(record)
+
+    def flush(self):
+        """Write buffered records in one append"""
+        with self.lock:
+            if not self.pending:
+                return
+            lines = "".join(json.dumps(record) + "\n" for record in self.pending)
+            try:
+                with open(self.path, "a") as f:
+                    f.write(lines)
+            except OSError as e:
+                print(f"Error writing {self.path}: {e}")
+                return
+            self.records += len(self.pending)
+            self.pending = []
+            if self.should_compact():
+                self.compact()
+
+    def should_compact(self):
+        return False
+
+    def compact(self):
+        pass
+
+    def rewrite(self, records):
+        """Atomically replace the log with records, dropping anything buffered; False if it failed"""
+        try:
+            atomic_write(self.path, "".join(json.dumps(record) + "\n" for record in records))
+        except OSError as e:
+            print(f"Error writing {self.path}: {e}")
+            return False
+        self.records = len(records)
+        self.pending = []
+        return True
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from jsonl_journal import atomic_write
+
+class ResponseCache:
+    """Content-addressed cache of model responses: an in-memory LRU in front of an on-disk store"""
+
+    def __init__(self, cache_dir=".llm_cache", max_memory_entries=256,
+                 max_disk_bytes=5 * 1024 * 1024, default_ttl=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.default_ttl = default_ttl  # Seconds before an entry is considered stale
+        self.memory = OrderedDict()  # key -> entry, most recently used last
+        self.disk_index = None  # key -> file size, oldest first; built on first disk access
+        self.disk_bytes = 0
+        self.lock = threading.Lock()  # Requests run on worker threads
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "stores": 0,
+            "evictions": 0
+        }
+
+    @staticmethod
+    def make_key(model, messages, max_tokens, temperature):
+        """Hash everything that affects the completion into a stable cache key"""
+        payload = json.dumps([model, messages, max_tokens, temperature], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached content for key, or None on a miss"""
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if self.is_expired(entry):
+                    self.discard(key)
+                    self.stats["expired"] += 1
+                    self.stats["misses"] += 1
+                    return None
+                self.memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry["content"]
+
+            entry = self.read_disk(key)
+            if entry is None or self.is_expired(entry):
+                if entry is not None:
+                    self.discard(key)
+                    self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self.remember(key, entry)
+            self.stats["disk_hits"] += 1
+            return entry["content"]
+
+    def put(self, key, content, ttl=None):
+        entry = {
+            "created": time.time(),
+            "ttl": ttl if ttl is not None else self.default_ttl,
+            "content": content
+        }
+        with self.lock:
+            self.remember(key, entry)
+            self.write_disk(key, entry)
+            self.stats["stores"] += 1
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            for key in list(self.load_disk_index()):
+                self.remove_disk(key)
+
+    def summary(self):
+        """Counters plus the hit rate, for measuring how many round-trips the cache saves"""
+        with self.lock:
+            stats = dict(self.stats)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+    def is_expired(self, entry):
+        return time.time() - entry["created"] > entry["ttl"]
+
+    def remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def discard(self, key):
+        self.memory.pop(key, None)
+        self.remove_disk(key)
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load_disk_index(self):
+        """Scan the cache directory once, oldest files first, so size eviction knows what to drop"""
+        if self.disk_index is None:
+            self.disk_index = OrderedDict()
+            self.disk_bytes = 0
+            if os.path.isdir(self.cache_dir):
+                files = []
+                for item in os.scandir(self.cache_dir):
+                    if item.name.endswith(".json"):
+                        info = item.stat()
+                        files.append((info.st_mtime, item.name[:-5], info.st_size))
+                for _, key, size in sorted(files):
+                    self.disk_index[key] = size
+                    self.disk_bytes += size
+        return self.disk_index
+
+    def read_disk(self, key):
+        if key not in self.load_disk_index():
+            return None
+        try:
+            with open(self.path_for(key), "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.remove_disk(key)
+            return None
+
+    def write_disk(self, key, entry):
+        index = self.load_disk_index()
+        data = json.dumps(entry)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            atomic_write(self.path_for(key), data)
+        except OSError as e:
+            print(f"Error writing response cache: {e}")
+            return
+
+        self.disk_bytes -= index.pop(key, 0)
+        index[key] = len(data)
+        self.disk_bytes += len(data)
+        while self.disk_bytes > self.max_disk_bytes and len(index) > 1:
+            oldest = next(iter(index))
+            self.remove_disk(oldest)
+            self.memory.pop(oldest, None)
+            self.stats["evictions"] += 1
+
+    def remove_disk(self, key):
+        index = self.load_disk_index()
+        if key in index:
+            self.disk_bytes -= index.pop(key)
+        try:
+            os.remove(self.path_for(key))
+        except OSError:
+            pass
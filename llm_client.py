@@ -0,0 +1,168 @@
+import os
+import time
+from llm_cache import ResponseCache
+from llm_stats import CallStats
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+class OpenAIBackend:
+    """Chat completions through the openai SDK, which is imported and configured on first use"""
+
+    name = "openai"
+
+    def __init__(self, env_path="config.env"):
+        self.env_path = env_path
+        self.api_key = None
+        self.deepseek_key = None
+        self.keys_loaded = False
+        self.sdk = None  # The openai module; imported on the first real request, not at startup
+
+    def load_keys(self):
+        """Read the API keys from config.env once; dotenv is only imported here"""
+        if not self.keys_loaded:
+            from dotenv import load_dotenv
+            load_dotenv(dotenv_path=self.env_path)
+            self.api_key = os.getenv("OPENAI_API_KEY")
+            self.deepseek_key = os.getenv("DEEPSEEK_API_KEY")
+            self.keys_loaded = True
+        return self.api_key, self.deepseek_key
+
+    def set_keys(self, api_key, deepseek_key):
+        self.api_key = api_key
+        self.deepseek_key = deepseek_key
+        self.keys_loaded = True
+        if self.sdk is not None:
+            self.sdk.api_key = api_key
+
+    def openai(self):
+        """The configured openai module, importing it on first use"""
+        if self.sdk is None:
+            self.load_keys()
+            import openai
+            openai.api_key = self.api_key
+            self.sdk = openai
+        return self.sdk
+
+    def complete(self, params):
+        """Returns (text, usage) where usage has prompt_tokens and completion_tokens, or None"""
+        response = self.openai().ChatCompletion.create(**params)
+        return response.choices[0].message['content'], getattr(response, "usage", None)
+
+    def stream(self, params):
+        for chunk in self.openai().ChatCompletion.create(stream=True, **params):
+            content = chunk["choices"][0].get("delta", {}).get("content")
+            if content:
+                yield content
+
+class ModelClient:
+    """
+    Single entry point for chat completions, with opt-in response caching per call site.
+    The backend makes the actual call: OpenAIBackend, or OfflineBackend for benchmarks and CI.
+    """
+
+    def __init__(self, cache=None, backend=None, max_retries=2, retry_delay=0.5):
+        self.cache = cache if cache is not None else ResponseCache()
+        self.openai_backend = OpenAIBackend()  # Kept for the settings dialog even when offline
+        self.backend = backend if backend is not None else self.openai_backend
+        self.max_retries = max_retries  # Extra attempts after a failed request
+        self.retry_delay = retry_delay  # Seconds, multiplied by the attempt number
+        self.stats = CallStats()
+
+    def set_backend(self, backend):
+        self.backend = backend
+
+    def build_params(self, messages, model, max_tokens, temperature):
+        params = {"model": model, "messages": messages}
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        if temperature is not None:
+            params["temperature"] = temperature
+        return params
+
+    def complete(self, messages, model=DEFAULT_MODEL, max_tokens=None, temperature=None,
+                 cache=False, cache_ttl=None, cache_if=None):
+        """
+        Return the text of a chat completion.
+        Pass cache=True for deterministic or low-variance prompts; cache_ttl overrides the default expiry.
+        cache_if(content) decides whether a reply is good enough to keep, so a rejected or
+        unparseable one is asked for again next time instead of being replayed.
+        """
+        site = self.stats.call_site()
+        started = time.perf_counter()
+        prompt_tokens = sum(self.stats.estimate_tokens(message["content"]) for message in messages)
+        key = None
+        if cache:
+            # Keyed by backend too, so offline replies never answer real requests
+            key = self.cache.make_key(f"{self.backend.name}/{model}", messages, max_tokens, temperature)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats.record(site, self.backend.name, model, started, 0, 0, cached=True)
+                return cached
+
+        params = self.build_params(messages, model, max_tokens, temperature)
+        retries = 0
+        while True:
+            try:
+                content, usage = self.backend.complete(params)
+                break
+            except Exception as e:
+                if retries >= self.max_retries:
+                    self.stats.record(site, self.backend.name, model, started, prompt_tokens, 0,
+                                      retries=retries, error=str(e))
+                    raise
+                retries += 1
+                time.sleep(self.retry_delay * retries)
+
+        if usage:
+            prompt_tokens, completion_tokens = usage["prompt_tokens"], usage["completion_tokens"]
+        else:
+            completion_tokens = self.stats.estimate_tokens(content)
+        self.stats.record(site, self.backend.name, model, started, prompt_tokens, completion_tokens, retries=retries)
+
+        if key is not None and (cache_if is None or cache_if(content)):
+            self.cache.put(key, content, ttl=cache_ttl)
+        return content
+
+    def stream(self, messages, model=DEFAULT_MODEL, max_tokens=None, temperature=None):
+        """Return a generator of completion text chunks as the model produces them"""
+        # Taken here: once the generator runs, its caller is the worker thread, not the game method
+        site = self.stats.call_site()
+        params = self.build_params(messages, model, max_tokens, temperature)
+        return self.stream_chunks(params, site)
+
+    def stream_chunks(self, params, site):
+        started = time.perf_counter()
+        prompt_tokens = sum(self.stats.estimate_tokens(message["content"]) for message in params["messages"])
+        parts = []
+        retries = 0
+        while True:
+            try:
+                for chunk in self.backend.stream(params):
+                    parts.append(chunk)
+                    yield chunk
+                break
+            except Exception as e:
+                # Only retry if nothing has been shown yet
+                if parts or retries >= self.max_retries:
+                    self.stats.record(site, self.backend.name, params["model"], started, prompt_tokens,
+                                      self.stats.estimate_tokens("".join(parts)), retries=retries,
+                                      streamed=True, error=str(e))
+                    raise
+                retries += 1
+                time.sleep(self.retry_delay * retries)
+
+        self.stats.record(site, self.backend.name, params["model"], started, prompt_tokens,
+                          self.stats.estimate_tokens("".join(parts)), retries=retries, streamed=True)
+
+    def cache_stats(self):
+        return self.cache.summary()
+
+def default_backend():
+    """LLM_BACKEND=offline swaps in the deterministic stand-in, configured by OfflineBackend.from_env"""
+    if os.getenv("LLM_BACKEND", "").lower() == "offline":
+        from offline_backend import OfflineBackend
+        return OfflineBackend.from_env()
+    return None
+
+# Shared by GameState and GameActions so every call site goes through the same cache
+model_client = ModelClient(backend=default_backend())
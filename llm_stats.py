@@ -0,0 +1,94 @@
+import json
+import sys
+import threading
+import time
+from collections import deque
+
+class CallStats:
+    """
+    Records every model request: wall time, prompt/completion tokens, retries, whether it was a
+    cache hit or a stream, and the game method that made it. Aggregated per call site for /stats.
+    """
+
+    def __init__(self, max_records=2000):
+        self.records = deque(maxlen=max_records)  # Most recent calls, for the JSON-lines export
+        self.sites = {}  # call site -> running totals
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def call_site(skip_modules=("llm_client", "llm_stats")):
+        """'Class.method' of the nearest caller outside the client, e.g. 'GameActions.hunt_animal'"""
+        frame = sys._getframe(1)
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "")
+            if module not in skip_modules:
+                # Closures and lambdas count as the method that defined them; co_qualname is 3.11+
+                code = frame.f_code
+                return getattr(code, "co_qualname", code.co_name).split(".<locals>")[0]
+            frame = frame.f_back
+        return "unknown"
+
+    @staticmethod
+    def estimate_tokens(text):
+        """Rough token count (about 4 characters each) when the backend doesn't report usage"""
+        return max(1, len(text) // 4) if text else 0
+
+    def record(self, site, backend, model, started, prompt_tokens, completion_tokens,
+               retries=0, cached=False, streamed=False, error=None):
+        entry = {
+            "time": time.time(),
+            "site": site,
+            "backend": backend,
+            "model": model,
+            "ms": round((time.perf_counter() - started) * 1000, 2),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "retries": retries,
+            "cached": cached,
+            "streamed": streamed,
+            "error": error
+        }
+        with self.lock:
+            self.records.append(entry)
+            totals = self.sites.setdefault(site, {
+                "calls": 0, "cached": 0, "errors": 0, "retries": 0, "total_ms": 0.0,
+                "max_ms": 0.0, "prompt_tokens": 0, "completion_tokens": 0
+            })
+            totals["calls"] += 1
+            totals["cached"] += cached
+            totals["errors"] += error is not None
+            totals["retries"] += retries
+            totals["total_ms"] += entry["ms"]
+            totals["max_ms"] = max(totals["max_ms"], entry["ms"])
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+        return entry
+
+    def summary(self):
+        """Per-site totals, most expensive (total wall time) first"""
+        with self.lock:
+            sites = {site: dict(totals) for site, totals in self.sites.items()}
+        return dict(sorted(sites.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+    def report(self):
+        """Plain-text table for the /stats command"""
+        sites = self.summary()
+        if not sites:
+            return "No model calls yet.\n"
+        lines = [f"{'call site':<36}{'calls':>6}{'cached':>7}{'avg ms':>9}{'max ms':>9}{'tokens in/out':>16}{'retries':>8}"]
+        for site, totals in sites.items():
+            average = totals["total_ms"] / totals["calls"]
+            tokens = f"{totals['prompt_tokens']}/{totals['completion_tokens']}"
+            lines.append(f"{site:<36}{totals['calls']:>6}{totals['cached']:>7}{average:>9.1f}"
+                         f"{totals['max_ms']:>9.1f}{tokens:>16}{totals['retries']:>8}"
+                         + (f"  {totals['errors']} failed" if totals["errors"] else ""))
+        return "\n".join(lines) + "\n"
+
+    def export_jsonl(self, path):
+        """Write the recorded calls, one JSON object per line; returns how many were written"""
+        with self.lock:
+            records = list(self.records)
+        with open(path, "w") as f:
+            for entry in records:
+                f.write(json.dumps(entry) + "\n")
+        return len(records)
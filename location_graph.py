@@ -0,0 +1,93 @@
+import re
+from jsonl_journal import JsonlJournal
+
+DIRECTIONS = ("north", "south", "east", "west", "up", "down", "back")
+
+# The move that leads back the way the player came
+OPPOSITE_MOVES = {
+    "north": "south", "south": "north", "east": "west", "west": "east",
+    "up": "down", "down": "up", "onward": "back", "back": "onward"
+}
+
+direction_pattern = re.compile(rf"\b({'|'.join(DIRECTIONS)})\b", re.IGNORECASE)
+
+def move_key(user_input):
+    """'go north' and 'walk north' are the same move; anything without a direction is 'onward'"""
+    found = direction_pattern.search(user_input)
+    return found.group(1).lower() if found else "onward"
+
+class LocationGraph(JsonlJournal):
+    """
+    Every place the player has been, so returning to one (or looking around it again) is
+    served from disk instead of a new model call. Nodes hold the narration, scene pools and
+    the items still lying there; each node's exits map a move ("north", "onward", ...) to
+    the node it leads to, and every move also records the way back.
+    Stored as an append-only JSON-lines journal, rewritten from memory when it has grown to
+    compact_ratio times the live records.
+    """
+
+    def __init__(self, path="game_locations.jsonl", compact_ratio=4):
+        super().__init__(path)
+        self.compact_ratio = compact_ratio
+        self.nodes = {}  # id -> {"narration", "location", "scene_pools", "items", "exits"}
+        self.next_id = 1
+        self.replay()
+
+    def apply(self, record):
+        op = record.get("op")
+        if op == "node":
+            self.nodes[record["id"]] = record["node"]
+            self.next_id = max(self.next_id, int(record["id"]) + 1)
+        elif op == "patch":
+            node = self.nodes.get(record["id"])
+            if node is not None:
+                node.update(record["set"])
+        elif op == "exit":
+            node = self.nodes.get(record["id"])
+            if node is not None:
+                node.setdefault("exits", {})[record["move"]] = record["to"]
+
+    def add(self, narration, location="unknown", scene_pools=None, items=None):
+        """Store a new place and return its id"""
+        with self.lock:
+            node_id = str(self.next_id)
+            self.next_id += 1
+            node = {"narration": narration, "location": location, "scene_pools": scene_pools,
+                    "items": dict(items or {}), "exits": {}}
+            self.nodes[node_id] = node
+            self.append_record({"op": "node", "id": node_id, "node": node})
+            return node_id
+
+    def update(self, node_id, changes):
+        """Set fields of a place in place; unchanged values aren't logged again"""
+        with self.lock:
+            node = self.nodes.get(node_id)
+            if node is None:
+                return False
+            changes = {key: value for key, value in changes.items() if node.get(key) != value}
+            if changes:
+                node.update(changes)
+                self.append_record({"op": "patch", "id": node_id, "set": changes})
+            return True
+
+    def connect(self, from_id, move, to_id):
+        """Record that move leads from one place to the other, and the opposite move back"""
+        with self.lock:
+            for node_id, step, target in ((from_id, move, to_id), (to_id, OPPOSITE_MOVES.get(move), from_id)):
+                node = self.nodes.get(node_id)
+                if node is None or step is None or node["exits"].get(step) == target:
+                    continue
+                node["exits"][step] = target
+                self.append_record({"op": "exit", "id": node_id, "move": step, "to": target})
+
+    def exit(self, node_id, move):
+        """Id of the place move leads to from node_id, or None if the player hasn't gone that way"""
+        node = self.nodes.get(node_id)
+        return node["exits"].get(move) if node is not None else None
+
+    def should_compact(self):
+        return self.records > self.compact_ratio * max(1, len(self.nodes))
+
+    def compact(self):
+        """Rewrite the log as one record per place, dropping superseded patches"""
+        self.rewrite([{"op": "node", "id": node_id, "node": node} for node_id, node in self.nodes.items()])
@@ -0,0 +1,143 @@
+import json
+import random
+from jsonl_journal import JsonlJournal, atomic_write
+
+class NPCJournal(JsonlJournal):
+    """
+    NPC roster stored as a snapshot (game_characters.json) plus an append-only JSON-lines journal.
+    The roster is loaded into memory once; adding an NPC appends one line instead of rewriting
+    the file, and the journal is periodically compacted back into the snapshot.
+    Name and type indexes (plus an id list for random picks) keep lookups constant-time, and
+    updates are patched in place and buffered until flush(), so a turn costs at most one append.
+    """
+
+    def __init__(self, snapshot_path="game_characters.json", journal_path="game_characters.jsonl",
+                 compact_every=200):
+        super().__init__(journal_path)
+        self.snapshot_path = snapshot_path
+        self.compact_every = compact_every  # Journal records allowed before compaction
+        self.npcs = {}
+        self.next_id = 1
+        self.by_name = {}  # lowercased name -> {id: None}, oldest first
+        self.by_type = {}  # lowercased type -> {id: None}
+        self.id_list = []  # Every id, for random picks
+        self.id_positions = {}  # id -> index in id_list, for O(1) removal
+        self.load()
+
+    def load(self):
+        """Read the snapshot and replay the journal on top of it"""
+        try:
+            with open(self.snapshot_path, "r") as f:
+                self.npcs = json.load(f)
+        except FileNotFoundError:
+            self.npcs = {}
+            self.write_snapshot()
+        except json.JSONDecodeError as e:
+            print(f"Error reading {self.snapshot_path}: {e}")
+            self.npcs = {}
+
+        self.next_id = max((int(npc_id) for npc_id in self.npcs if npc_id.isdigit()), default=0) + 1
+        self.replay()
+        self.rebuild_indexes()
+
+    def rebuild_indexes(self):
+        self.by_name.clear()
+        self.by_type.clear()
+        self.id_list = []
+        self.id_positions.clear()
+        for npc_id, npc in self.npcs.items():
+            self.index(npc_id, npc)
+
+    def index(self, npc_id, npc):
+        self.by_name.setdefault(str(npc.get("name", "")).lower(), {})[npc_id] = None
+        self.by_type.setdefault(str(npc.get("type", "")).lower(), {})[npc_id] = None
+        self.id_positions[npc_id] = len(self.id_list)
+        self.id_list.append(npc_id)
+
+    def unindex(self, npc_id, npc):
+        for table, key in ((self.by_name, npc.get("name", "")), (self.by_type, npc.get("type", ""))):
+            ids = table.get(str(key).lower())
+            if ids is not None:
+                ids.pop(npc_id, None)
+                if not ids:
+                    del table[str(key).lower()]
+        # Swap the last id into the removed slot
+        position = self.id_positions.pop(npc_id)
+        last = self.id_list.pop()
+        if last != npc_id:
+            self.id_list[position] = last
+            self.id_positions[last] = position
+
+    def apply(self, record):
+        op = record.get("op")
+        if op == "put":
+            self.npcs[record["id"]] = record["npc"]
+            if record["id"].isdigit():
+                self.next_id = max(self.next_id, int(record["id"]) + 1)
+        elif op == "patch":
+            npc = self.npcs.get(record["id"])
+            if npc is not None:
+                npc.update(record["set"])
+        elif op == "delete":
+            self.npcs.pop(record["id"], None)
+        elif op == "meta":
+            self.next_id = max(self.next_id, record.get("next_id", 1))
+
+    def should_compact(self):
+        return self.records >= self.compact_every
+
+    def add(self, npc_data):
+        """Store a new NPC under the next id and return the id"""
+        with self.lock:
+            npc_id = str(self.next_id)
+            self.next_id += 1
+            self.npcs[npc_id] = npc_data
+            self.index(npc_id, npc_data)
+            self.append_record({"op": "put", "id": npc_id, "npc": npc_data})
+            return npc_id
+
+    def update(self, npc_id, changes):
+        """Set top-level fields (memory, disposition, ...) on an NPC in place"""
+        with self.lock:
+            npc = self.npcs.get(npc_id)
+            if npc is None:
+                return False
+            renamed = any(npc.get(field) != changes[field] for field in ("name", "type") if field in changes)
+            if renamed:
+                self.unindex(npc_id, npc)
+            npc.update(changes)
+            if renamed:
+                self.index(npc_id, npc)
+            self.append_record({"op": "patch", "id": npc_id, "set": changes})
+            return True
+
+    def remove(self, npc_id):
+        with self.lock:
+            npc = self.npcs.pop(npc_id, None)
+            if npc is not None:
+                self.unindex(npc_id, npc)
+                self.append_record({"op": "delete", "id": npc_id})
+
+    def ids_named(self, name):
+        """Ids of every NPC with this name, oldest first; namesakes are different people"""
+        return list(self.by_name.get(name.lower().strip(), ()))
+
+    def ids_of_type(self, npc_type):
+        return list(self.by_type.get(npc_type.lower().strip(), ()))
+
+    def random_id(self):
+        return random.choice(self.id_list) if self.id_list else None
+
+    def compact(self):
+        """Fold the journal into the snapshot; the id counter survives so ids are never reused"""
+        if self.write_snapshot():
+            # Anything still buffered is already in the snapshot
+            self.rewrite([{"op": "meta", "next_id": self.next_id}])
+
+    def write_snapshot(self):
+        try:
+            atomic_write(self.snapshot_path, json.dumps(self.npcs, indent=4))
+            return True
+        except OSError as e:
+            print(f"Error writing {self.snapshot_path}: {e}")
+            return False
@@ -0,0 +1,193 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+
+# Scene pieces: where the player is, and something that could be picked up there
+SCENE_PLACES = [
+    "A narrow footpath climbs through rhododendron thickets",
+    "The trail levels out along a cold, fast creek",
+    "A rocky outcrop opens onto a view of blue ridges",
+    "Tall hemlocks shade a mossy clearing",
+    "An abandoned logging road crosses the trail",
+    "A split-rail fence marks the edge of a hillside farm"
+]
+SCENE_ITEMS = [
+    ("fallen branches", "branch"),
+    ("smooth stones", "stone"),
+    ("wild berries", "berry"),
+    ("curling strips of bark", "bark"),
+    ("tangled vines", "vine"),
+    ("brown mushrooms", "mushroom")
+]
+NPC_NAMES = ["Old Tom", "Martha Greer", "Eli Shelton", "Widow Pruitt", "Jonas Cable", "Ruth Ann Hale"]
+NPC_TYPES = ["traveler", "hunter", "farmer", "vendor", "guide", "craftsman"]
+DIALOGUE = [
+    "Well now, ain't often we see folks up this way.",
+    "Mind the creek crossing, it runs high after the rains.",
+    "I've walked these ridges thirty years and they still surprise me.",
+    "Reckon you'll want to reach the gap before nightfall.",
+    "Trade's slow this season, but I've got what you need."
+]
+RECIPE_MATERIALS = ["stick", "stone", "vine", "bark", "leather", "bone", "fiber", "rope"]
+
+class OfflineBackendError(Exception):
+    """Injected failure, raised where a real backend would raise a network or API error"""
+
+class OfflineBackend:
+    """
+    Stand-in for the model API. Recognizes each game prompt and answers with a templated reply in
+    the format its call site parses, so the whole game runs with no network. Replies depend only on
+    the seed, the prompt and the call count, so runs are repeatable. latency/jitter (seconds) and
+    failure_rate are injected to exercise the worker and error paths.
+    """
+
+    name = "offline"
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0, chunk_size=8):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.chunk_size = chunk_size  # Characters per streamed chunk
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """OFFLINE_LATENCY_MS, OFFLINE_JITTER_MS, OFFLINE_FAILURE_RATE and OFFLINE_SEED"""
+        return cls(
+            latency=float(os.getenv("OFFLINE_LATENCY_MS", "0")) / 1000,
+            jitter=float(os.getenv("OFFLINE_JITTER_MS", "0")) / 1000,
+            failure_rate=float(os.getenv("OFFLINE_FAILURE_RATE", "0")),
+            seed=int(os.getenv("OFFLINE_SEED", "0"))
+        )
+
+    def complete(self, params):
+        """Returns (text, usage); usage is left to the client to estimate"""
+        rng = self.start_call(params["messages"])
+        return self.respond(params["messages"], rng), None
+
+    def stream(self, params):
+        rng = self.start_call(params["messages"])
+        text = self.respond(params["messages"], rng)
+        for i in range(0, len(text), self.chunk_size):
+            yield text[i:i + self.chunk_size]
+
+    def start_call(self, messages):
+        """Count the call, then sleep for the injected latency and maybe fail"""
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        rng = random.Random(f"{self.seed}:{call}:{messages[-1]['content']}")
+        delay = self.latency + (rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+        if self.failure_rate and rng.random() < self.failure_rate:
+            raise OfflineBackendError(f"Injected failure on offline call {call}")
+        return rng
+
+    def respond(self, messages, rng):
+        system = messages[0]["content"]
+        user = messages[-1]["content"]
+
+        if '"narration"' in system:
+            return json.dumps(self.scene(rng))
+        if "scene pools" in system:
+            scene = self.scene(rng)
+            return json.dumps({"item_pool": scene["item_pool"], "npc_pool": scene["npc_pool"]})
+        if "describing scenes" in system:
+            return self.scene(rng)["narration"]
+        if "Extract any characters" in system:
+            npcs = []
+            for npc_type in NPC_TYPES:
+                if npc_type in user.lower():
+                    npc = self.npc(rng, npc_type)
+                    npcs.append({"name": npc["name"], "type": npc_type, "description": npc["description"]})
+            return json.dumps(npcs)
+        if "Create an NPC" in system or "Generate an NPC" in system or "Create a character" in system:
+            return json.dumps(self.npc(rng, self.requested_type(system, user)))
+        if "Summarize this hike" in system:
+            return f"The traveler has walked through {len(user.splitlines())} stretches of trail without trouble."
+        if "Summarize this conversation" in system:
+            turns = sum(1 for line in user.splitlines() if line.startswith("Traveler: "))
+            return f"The traveler talked with them about the trail {turns} times and seemed friendly."
+        if "ONLY respond in character" in system:
+            return rng.choice(DIALOGUE)
+        if "crafting recipe" in user:
+            return self.recipe(user, rng)
+        if "natural_items" in system:
+            items = self.items_in(user, rng)
+            return json.dumps({"natural_items": items, "found_items": {}, "valuable_items": {}})
+        if "collect" in system and "JSON object" in system:
+            return json.dumps(self.items_in(user, rng))
+        if "hunting attempt" in system:
+            return rng.choice(["The hunt is a success: a plump rabbit is caught in the brush.",
+                               "The deer bolts into the laurel before a shot can be taken."])
+        if "usage description" in system:
+            frame = re.search(r"Current frame: (.*)\nItem used:", user, re.DOTALL)
+            return frame.group(1) if frame else "{}"
+        if "night's rest" in system:
+            return "Crickets sing beyond the shelter walls as sleep comes easily."
+        if "creating acts" in system:
+            return json.dumps({"goal": "Reach the Nantahala gap", "scenes": ["river ford", "fire tower", "mountain store"]})
+        return "The trail goes quiet for a moment."
+
+    def scene(self, rng):
+        place = rng.choice(SCENE_PLACES)
+        item_text, item = rng.choice(SCENE_ITEMS)
+        npc_type = rng.choice(NPC_TYPES)
+        return {
+            "narration": f"{place}, and {item_text} lie scattered near a {npc_type} resting by the path.",
+            "item_pool": {
+                "common": [item, "stick", "leaf"],
+                "uncommon": ["herbs", "rope"],
+                "rare": ["coins"]
+            },
+            "npc_pool": {
+                "common": [npc_type, "traveler"],
+                "uncommon": ["vendor", "guide"],
+                "rare": ["doctor"]
+            },
+            "items": {item: rng.randint(1, 5)}
+        }
+
+    @staticmethod
+    def requested_type(system, user):
+        """
+        The NPC type a prompt asks for ("Type requested: vendor", "of type vendor", or a type named
+        in the user message such as "the old hunter"), or None for any type
+        """
+        found = re.search(r"(?:Type requested:|of type)\s*([a-z]+)", f"{system}\n{user}", re.IGNORECASE)
+        if found and found.group(1).lower() not in ("any", "type"):
+            return found.group(1).lower()
+        # The system prompts list example types, so only the user message can name one otherwise
+        lowered = user.lower()
+        return next((npc_type for npc_type in NPC_TYPES if re.search(rf"\b{npc_type}\b", lowered)), None)
+
+    def npc(self, rng, npc_type=None):
+        npc_type = npc_type or rng.choice(NPC_TYPES)
+        npc = {
+            "name": rng.choice(NPC_NAMES),
+            "type": npc_type,
+            "description": f"a weathered {npc_type} in a patched wool coat",
+            "personality": rng.choice(["wary but kind", "talkative", "gruff", "curious"]),
+            "dialogue_style": "plain mountain speech"
+        }
+        if npc_type == "vendor":
+            npc["inventory"] = {"jerky": [3, 2], "rope": [1, 5]}
+        return npc
+
+    def recipe(self, user, rng):
+        found = re.search(r"recipe for (.+?) using", user)
+        item_name = found.group(1) if found else "item"
+        materials = rng.sample(RECIPE_MATERIALS, 2)
+        return f"{item_name}: {rng.randint(1, 3)} {materials[0]}, {rng.randint(1, 2)} {materials[1]} - Bind them together firmly."
+
+    def items_in(self, description, rng):
+        """Items the description mentions, or a couple of common ones"""
+        lowered = description.lower()
+        items = {item: rng.randint(1, 4) for text, item in SCENE_ITEMS if text in lowered or item in lowered}
+        return items or {"stick": 2, "stone": 1}
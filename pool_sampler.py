@@ -0,0 +1,77 @@
+import random
+
+# How often each rarity tier comes up; entries within a tier are equally likely
+TIER_WEIGHTS = {"common": 0.7, "uncommon": 0.25, "rare": 0.05}
+
+# Quantity range for a sampled item, by tier
+TIER_QUANTITIES = {"common": (1, 4), "uncommon": (1, 2), "rare": (1, 1)}
+
+class AliasTable:
+    """
+    Walker's alias method (Vose's construction): O(n) to build, then each weighted draw is
+    one uniform index plus one coin flip, however many outcomes there are.
+    """
+
+    def __init__(self, outcomes, weights):
+        self.outcomes = list(outcomes)
+        count = len(self.outcomes)
+        total = float(sum(weights))
+        scaled = [weight * count / total for weight in weights]
+        self.probability = [1.0] * count
+        self.alias = list(range(count))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left over is 1.0 up to rounding error
+
+    def draw(self, rng):
+        column = rng.randrange(len(self.outcomes))
+        return self.outcomes[column if rng.random() < self.probability[column] else self.alias[column]]
+
+class ScenePoolSampler:
+    """
+    Weighted draws from a scene's item_pool and npc_pool without a model call.
+    The alias tables are built once per set of pools and reused for every draw in that scene,
+    so pools can stay the same across turns in one location.
+    """
+
+    def __init__(self, pools, rng=None):
+        self.pools = pools
+        self.rng = rng if rng is not None else random.Random()
+        self.items = self.build(pools.get("item_pool", {}))
+        self.npcs = self.build(pools.get("npc_pool", {}))
+
+    @staticmethod
+    def build(pool):
+        """One table over every (tier, entry) in the pool, or None if the pool is empty"""
+        outcomes = []
+        weights = []
+        for tier, tier_weight in TIER_WEIGHTS.items():
+            entries = [entry for entry in pool.get(tier, []) if isinstance(entry, str) and entry.strip()]
+            for entry in entries:
+                outcomes.append((tier, entry.strip().lower()))
+                weights.append(tier_weight / len(entries))
+        return AliasTable(outcomes, weights) if outcomes else None
+
+    def draw_items(self, draws=3):
+        """{item: quantity} from draws weighted picks; repeated picks add up"""
+        items = {}
+        if self.items is None:
+            return items
+        for _ in range(draws):
+            tier, item = self.items.draw(self.rng)
+            low, high = TIER_QUANTITIES[tier]
+            items[item] = min(10, items.get(item, 0) + self.rng.randint(low, high))
+        return items
+
+    def roll_encounter(self, chance=0.15):
+        """An NPC type from the npc pool with probability chance, otherwise None"""
+        if self.npcs is None or self.rng.random() >= chance:
+            return None
+        return self.npcs.draw(self.rng)[1]
@@ -0,0 +1,61 @@
+from llm_stats import CallStats
+
+class RollingSummary:
+    """
+    A log kept under a fixed token budget for prompts, stored as {"summary": ..., field: [...]}.
+    The last keep_recent entries are kept word for word; once fold_every more have piled up,
+    the older ones are folded into the summary by a background model request, so prompts stay
+    the same size however long the log grows. Subclasses say where the log lives, what an
+    entry costs and how it reads in the summary prompt.
+    """
+
+    field = "entries"  # Key of the entry list in the stored log
+
+    def __init__(self, budget_tokens, keep_recent, fold_every):
+        self.budget_tokens = budget_tokens  # Prompt tokens for summary plus verbatim entries
+        self.keep_recent = keep_recent
+        self.fold_every = fold_every
+        self.folding = set()  # Keys of logs with a summary request in flight
+
+    def entry_cost(self, entry):
+        return CallStats.estimate_tokens(entry)
+
+    def recent(self, log, budget):
+        """The newest entries, oldest first, as many as fit in budget tokens"""
+        recent = []
+        for entry in reversed(log[self.field]):
+            cost = self.entry_cost(entry)
+            if cost > budget:
+                break
+            budget -= cost
+            recent.append(entry)
+        recent.reverse()
+        return recent
+
+    def append(self, log, entry, key=None):
+        """
+        Add an entry; returns the older entries to summarize, or [] if it isn't time yet.
+        They stay in the log until fold, so a failed summary loses nothing.
+        """
+        entries = log[self.field]
+        entries.append(entry)
+        if key in self.folding or len(entries) < self.keep_recent + self.fold_every:
+            return []
+        self.folding.add(key)
+        return entries[:-self.keep_recent]
+
+    def fold_messages(self, log, prompt, lines):
+        """Prompt folding lines written from older entries into the existing summary"""
+        if log["summary"]:
+            lines = [f"Earlier: {log['summary']}", *lines]
+        return [
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": "\n".join(lines)}
+        ]
+
+    def fold(self, log, summary, folded, key=None):
+        """Replace the summary and drop the folded entries; summary None means the request failed"""
+        self.folding.discard(key)
+        if summary:
+            log["summary"] = summary.strip()
+            del log[self.field][:len(folded)]
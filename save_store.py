@@ -0,0 +1,150 @@
+import copy
+import json
+from jsonl_journal import atomic_write, read_records
+
+SCHEMA_VERSION = 1
+
+class SaveStore:
+    """
+    Saved game as a compact base snapshot (game_save.json) plus a JSON-lines file of per-turn
+    deltas (game_save.jsonl). Each save appends only the keys that changed since the last one;
+    dict values such as the inventory are diffed key by key, and the story text as the lines
+    added since, so a load restores a matching state and story.
+    Scalars are compared on every save, but dict and list values only once mark_dirty() says they
+    changed, so a turn costs what it changed rather than the size of the whole game.
+    After compact_every deltas they are folded back into the base snapshot.
+    """
+
+    def __init__(self, base_path="game_save.json", delta_path="game_save.jsonl", compact_every=50):
+        self.base_path = base_path
+        self.delta_path = delta_path
+        self.compact_every = compact_every
+        self.saved = None  # State as of the last save or load, for diffing
+        self.dirty = set()  # Keys of dict and list values changed since the last save
+        self.story = ""  # Recent story lines stored with the base snapshot
+        self.delta_count = 0
+
+    def mark_dirty(self, key):
+        self.dirty.add(key)
+
+    def save(self, state, story=None):
+        """Append the changes since the last save; writes the base snapshot on the first save"""
+        if self.saved is None:
+            self.compact(state, story)
+            return
+        keys = [key for key, value in state.items()
+                if key in self.dirty or key not in self.saved or not isinstance(value, (dict, list))]
+        delta = self.diff(self.saved, {key: state[key] for key in keys})
+        if story is not None and story != self.story:
+            delta["story"] = self.story_delta(self.story, story)
+        if not delta:
+            self.dirty.clear()
+            return
+        try:
+            with open(self.delta_path, "a") as f:
+                f.write(json.dumps({"schema": SCHEMA_VERSION, **delta}, separators=(",", ":")) + "\n")
+        except OSError as e:
+            print(f"Error writing {self.delta_path}: {e}")
+            return
+        for key in keys:
+            self.saved[key] = copy.deepcopy(state[key])
+        self.dirty.clear()
+        if story is not None:
+            self.story = story
+        self.delta_count += 1
+        if self.delta_count >= self.compact_every:
+            self.compact(state, self.story)
+
+    def compact(self, state, story=None):
+        """Write state as the new base snapshot and start an empty delta file"""
+        if story is not None:
+            self.story = story
+        base = {"schema": SCHEMA_VERSION, "state": state, "story": self.story}
+        try:
+            atomic_write(self.base_path, json.dumps(base, separators=(",", ":")))
+            open(self.delta_path, "w").close()
+        except OSError as e:
+            print(f"Error writing {self.base_path}: {e}")
+            return
+        self.saved = copy.deepcopy(state)
+        self.dirty.clear()
+        self.delta_count = 0
+
+    def load(self):
+        """Return (state, story) from the base snapshot plus deltas, or None if there is no save"""
+        try:
+            with open(self.base_path, "r") as f:
+                base = json.load(f)
+        except FileNotFoundError:
+            return None
+        if base.get("schema") != SCHEMA_VERSION:
+            print(f"Unsupported save schema {base.get('schema')} in {self.base_path}")
+            return None
+
+        state = base["state"]
+        story = base.get("story", "")
+        self.delta_count = 0
+        for delta in read_records(self.delta_path):
+            if delta.get("schema") != SCHEMA_VERSION:
+                continue
+            self.apply(state, delta)
+            if "story" in delta:
+                story = self.apply_story(story, delta["story"])
+            self.delta_count += 1
+
+        self.saved = copy.deepcopy(state)
+        self.dirty.clear()
+        self.story = story
+        return state, self.story
+
+    @staticmethod
+    def diff(old, new):
+        """{"set": changed values, "merge": {key: {"set": ..., "del": [...]}} for dict values}"""
+        changed = {}
+        merged = {}
+        for key, value in new.items():
+            before = old.get(key)
+            if value == before:
+                continue
+            if isinstance(value, dict) and isinstance(before, dict):
+                merged[key] = {
+                    "set": {k: v for k, v in value.items() if k not in before or before[k] != v},
+                    "del": [k for k in before if k not in value]
+                }
+            else:
+                changed[key] = value
+        delta = {}
+        if changed:
+            delta["set"] = changed
+        if merged:
+            delta["merge"] = merged
+        return delta
+
+    @staticmethod
+    def story_delta(old, new, anchor_chars=200):
+        """
+        {"append": text, "length": n} when new is old plus some text with the start trimmed
+        (the story is a window over the transcript), otherwise {"set": new}
+        """
+        anchor = old[-anchor_chars:]
+        position = new.rfind(anchor) if anchor else -1
+        if position >= 0:
+            added = new[position + len(anchor):]
+            if new and (old + added)[-len(new):] == new:
+                return {"append": added, "length": len(new)}
+        return {"set": new}
+
+    @staticmethod
+    def apply_story(story, change):
+        if "set" in change:
+            return change["set"]
+        return (story + change["append"])[-change["length"]:]
+
+    @staticmethod
+    def apply(state, delta):
+        state.update(delta.get("set", {}))
+        for key, change in delta.get("merge", {}).items():
+            target = state.setdefault(key, {})
+            target.update(change.get("set", {}))
+            for removed in change.get("del", []):
+                target.pop(removed, None)
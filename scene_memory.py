@@ -0,0 +1,50 @@
+from llm_stats import CallStats
+from rolling_summary import RollingSummary
+
+SUMMARY_PROMPT = """Summarize this hike along the Appalachian Trail in 1897 for a storyteller continuing it.
+Keep where the traveler has been, who they met, and anything left unresolved.
+Reply with at most 3 short sentences and nothing else."""
+
+class SceneMemory(RollingSummary):
+    """
+    The journey so far for narration prompts, kept under a fixed token budget.
+    Stored in the frame as scene_context["scene_memory"] = {"summary": ..., "scenes": [...]}.
+    There is one journey, so at most one summary request is in flight.
+    """
+
+    field = "scenes"
+
+    def __init__(self, budget_tokens=300, recent_scenes=3, fold_every=3):
+        super().__init__(budget_tokens, recent_scenes, fold_every)
+
+    @staticmethod
+    def memory(context):
+        if "scene_memory" not in context:
+            # Frames saved before scene_memory kept a short previous_scenes list instead
+            context["scene_memory"] = {"summary": "", "scenes": list(context.pop("previous_scenes", []))}
+        return context["scene_memory"]
+
+    def history(self, context):
+        """The journey summary and as many recent scenes as fit the budget, for the system prompt"""
+        memory = self.memory(context)
+        recent = self.recent(memory, self.budget_tokens - CallStats.estimate_tokens(memory["summary"]))
+        parts = []
+        if memory["summary"]:
+            parts.append(f"Journey so far: {memory['summary']}")
+        if recent:
+            parts.append("Recent scenes: " + " | ".join(recent))
+        return "\n".join(parts) or "none yet, this is the start of the hike"
+
+    def record(self, context, scene):
+        """Add a narrated scene; returns the older scenes to summarize, or [] if it isn't time yet"""
+        memory = self.memory(context)
+        if not scene or (memory["scenes"] and memory["scenes"][-1] == scene):
+            return []
+        return self.append(memory, scene)
+
+    def summary_messages(self, memory, folded):
+        """Prompt folding older scenes into the existing journey summary"""
+        return self.fold_messages(memory, SUMMARY_PROMPT, folded)
+
+    def apply_summary(self, memory, summary, folded):
+        self.fold(memory, summary, folded)
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import Counter
+from llm_stats import CallStats
+from location_graph import move_key
+
+# What to prefetch before the player has moved often enough to have habits
+DEFAULT_MOVES = {
+    "onward": "follow the trail",
+    "north": "go north",
+    "south": "go south"
+}
+
+class ScenePrefetcher:
+    """
+    Speculative scene generation for movement commands, which are easy to predict.
+    After each scene the top_k most likely next moves (by how often the player has made them)
+    are generated in the background from the current frame. If the next command is one of those
+    moves and the scene hasn't changed, the prefetched reply is used instead of a new model call.
+    Branches expire after ttl seconds; unused ones are counted as wasted tokens.
+    While enabled is off nothing is prefetched, so take() doesn't look or count.
+    """
+
+    def __init__(self, top_k=2, ttl=90, enabled=True):
+        self.top_k = top_k
+        self.ttl = ttl
+        self.enabled = enabled
+        self.history = Counter()  # move key -> times the player made it
+        self.examples = {}  # move key -> the player's last wording of it
+        self.branches = {}  # move key -> {"content", "created", "tokens"}
+        self.scene = None  # Scene text the current branches continue from
+        self.generation = 0  # Bumped whenever the branches are thrown away
+        self.lock = threading.Lock()
+        self.stats = {"prefetched": 0, "hits": 0, "misses": 0, "wasted": 0, "wasted_tokens": 0}
+
+    def predict(self, known=()):
+        """(key, wording) for the top_k likeliest next moves, skipping moves in known"""
+        keys = [key for key, _ in self.history.most_common() if key not in known][:self.top_k]
+        for key in DEFAULT_MOVES:
+            if len(keys) >= self.top_k:
+                break
+            if key not in keys and key not in known:
+                keys.append(key)
+        return [(key, self.examples.get(key, DEFAULT_MOVES.get(key, f"go {key}"))) for key in keys]
+
+    def start(self, scene):
+        """Throw away branches for the previous scene; returns the generation new branches belong to"""
+        with self.lock:
+            self.discard_all()
+            self.scene = scene
+            self.generation += 1
+            return self.generation
+
+    def store(self, generation, key, messages, content):
+        """Keep a finished branch, unless the scene moved on while it was being generated"""
+        tokens = sum(CallStats.estimate_tokens(message["content"]) for message in messages)
+        tokens += CallStats.estimate_tokens(content or "")
+        with self.lock:
+            self.stats["prefetched"] += 1
+            if generation != self.generation or not content:
+                self.stats["wasted"] += 1
+                self.stats["wasted_tokens"] += tokens
+                return
+            self.branches[key] = {"content": content, "created": time.time(), "tokens": tokens}
+
+    def take(self, user_input, scene):
+        """The prefetched reply for this movement command, or None; records the move either way"""
+        if not self.enabled:
+            return None
+        key = move_key(user_input)
+        self.history[key] += 1
+        self.examples[key] = user_input
+        with self.lock:
+            branch = self.branches.pop(key, None) if scene == self.scene else None
+            if branch is not None and time.time() - branch["created"] > self.ttl:
+                self.stats["wasted"] += 1
+                self.stats["wasted_tokens"] += branch["tokens"]
+                branch = None
+            self.stats["hits" if branch else "misses"] += 1
+            # Whatever happens next, the other branches start from a scene that is about to change
+            self.discard_all()
+            self.generation += 1
+        return branch["content"] if branch else None
+
+    def discard_all(self):
+        for branch in self.branches.values():
+            self.stats["wasted"] += 1
+            self.stats["wasted_tokens"] += branch["tokens"]
+        self.branches.clear()
+
+    def summary(self):
+        with self.lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
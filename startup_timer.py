@@ -0,0 +1,30 @@
+import time
+
+class StartupTimer:
+    """Records how long each startup phase takes, from the first import to the window accepting input"""
+
+    def __init__(self, target_ms=500):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.target_ms = target_ms  # Budget for time-to-interactive
+        self.phases = []  # (phase, milliseconds)
+
+    def mark(self, phase):
+        """Close the current phase under the given name"""
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    def total_ms(self):
+        return (self.last - self.start) * 1000
+
+    def report(self):
+        print("Startup timing:")
+        for phase, elapsed in self.phases:
+            print(f"  {phase:<20} {elapsed:8.1f} ms")
+        total = self.total_ms()
+        verdict = "ok" if total <= self.target_ms else f"over the {self.target_ms} ms target"
+        print(f"  {'interactive':<20} {total:8.1f} ms ({verdict})")
+
+# Created on first import, so adventure_game.py imports it before anything else
+startup_timer = StartupTimer()
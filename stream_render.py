@@ -0,0 +1,122 @@
+import json
+import re
+
+class JSONFieldExtractor:
+    """Pulls the value of one string field out of a JSON document as it streams in"""
+
+    def __init__(self, field):
+        self.start_pattern = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self.buffer = ""
+        self.started = False
+        self.done = False
+
+    def feed(self, chunk):
+        """Return the newly decoded part of the field's value"""
+        if self.done:
+            return ""
+        self.buffer += chunk
+        if not self.started:
+            found = self.start_pattern.search(self.buffer)
+            if not found:
+                return ""
+            self.started = True
+            self.buffer = self.buffer[found.end():]
+
+        decoded = []
+        i = 0
+        while i < len(self.buffer):
+            char = self.buffer[i]
+            if char == '"':
+                self.done = True
+                self.buffer = ""
+                return "".join(decoded)
+            if char == "\\":
+                # Wait for the rest of a split escape sequence
+                length = 6 if self.buffer[i + 1:i + 2] == "u" else 2
+                if i + length > len(self.buffer):
+                    break
+                try:
+                    decoded.append(json.loads('"' + self.buffer[i:i + length] + '"'))
+                except json.JSONDecodeError:
+                    pass
+                i += length
+                continue
+            decoded.append(char)
+            i += 1
+        self.buffer = self.buffer[i:]
+        return "".join(decoded)
+
+class LeadingTextCleaner:
+    """
+    Streaming version of GameActions.clean_response: holds back the opening words until it is
+    clear whether they are a "You"/"Your" prefix, strips it, capitalizes, then passes text through.
+    """
+
+    def __init__(self):
+        self.held = ""
+        self.released = False
+
+    def feed(self, chunk):
+        if self.released:
+            return chunk
+        self.held += chunk
+        text = self.held.lstrip()
+        while text.lower().startswith(('you ', 'your ')):
+            text = text.split(' ', 1)[1].lstrip()
+        self.held = text
+        # Still could be the start of "you " / "your "
+        if len(text) < 5 and ('your '.startswith(text.lower()) or 'you '.startswith(text.lower())):
+            return ""
+        return self.release()
+
+    def finish(self):
+        return "" if self.released else self.release()
+
+    def release(self):
+        self.released = True
+        text = self.held
+        self.held = ""
+        if text and text[0].islower():
+            text = text[0].upper() + text[1:]
+        return text
+
+class StreamRenderer:
+    """Sends streamed model text to the game output as it arrives"""
+
+    def __init__(self, output, prefix="", json_field=None, clean=True, tag="game_text"):
+        self.output = output
+        self.prefix = prefix  # Written before the first visible text, e.g. "Old Tom: "
+        self.extractor = JSONFieldExtractor(json_field) if json_field else None
+        self.cleaner = LeadingTextCleaner() if clean else None
+        self.tag = tag
+        self.shown = []
+
+    @property
+    def shown_text(self):
+        return "".join(self.shown)
+
+    def feed(self, chunk):
+        """Called on the main thread with one or more coalesced chunks"""
+        text = self.extractor.feed(chunk) if self.extractor else chunk
+        if self.cleaner:
+            text = self.cleaner.feed(text)
+        elif not self.shown:
+            text = text.lstrip()
+        self.show(text)
+
+    def finish(self):
+        """Flush any held text and end the line; returns whether anything was displayed"""
+        if self.cleaner:
+            self.show(self.cleaner.finish())
+        if self.shown:
+            self.output.text("\n", self.tag)
+            return True
+        return False
+
+    def show(self, text):
+        if not text:
+            return
+        if not self.shown and self.prefix:
+            self.output.text(self.prefix, self.tag)
+        self.shown.append(text)
+        self.output.text(text, self.tag)
@@ -0,0 +1,41 @@
+import itertools
+from types import SimpleNamespace
+
+from crafting_index import CraftingIndex
+from game_actions import GameActions
+from item_lexicon import ItemLexicon
+
+RECIPES = {
+    "snare": {"materials": {"rope": 1, "stick": 2}},
+    "bundle": {"materials": {"stick": 2, "branch": 1}},
+    "sling": {"materials": {"rope": 2, "leather": 1}},
+    "fire": {"materials": {}}
+}
+
+def check_materials(index, inventory, recipe):
+    actions = SimpleNamespace(state=SimpleNamespace(crafting_index=index, inventory=inventory))
+    return GameActions.check_materials(actions, recipe)
+
+def test_partial_stock_across_names_is_craftable():
+    index = CraftingIndex(RECIPES, ItemLexicon())
+    inventory = {"rope": 1, "stick": 1, "branch": 1}
+    assert "snare" in index.craftable(inventory)
+    missing, substitutions = check_materials(index, inventory, RECIPES["snare"])
+    assert missing == []
+    assert substitutions == {"stick": {"stick": 1, "branch": 1}}
+
+def test_one_entry_is_not_counted_for_two_materials():
+    index = CraftingIndex(RECIPES, ItemLexicon())
+    # "branch" is a stick too, but the two sticks can't also be the branch
+    assert "bundle" not in index.craftable({"stick": 2})
+    assert "bundle" in index.craftable({"stick": 2, "branch": 1})
+
+def test_craftable_agrees_with_check_materials():
+    index = CraftingIndex(RECIPES, ItemLexicon())
+    names = ["rope", "vine", "stick", "branch", "twig", "leather"]
+    for counts in itertools.product(range(3), repeat=len(names)):
+        inventory = {name: count for name, count in zip(names, counts) if count}
+        craftable = index.craftable(inventory)
+        for name, recipe in RECIPES.items():
+            missing, _ = check_materials(index, inventory, recipe)
+            assert (name in craftable) == (not missing), (name, inventory)
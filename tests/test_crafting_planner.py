@@ -0,0 +1,14 @@
+from crafting_planner import CraftingPlanner
+from item_lexicon import ItemLexicon
+
+def test_partial_substitute_stock_counts_toward_missing():
+    recipes = {"snare": {"materials": {"rope": 8}}}
+    planner = CraftingPlanner(recipes, ItemLexicon())
+    plan = planner.plan("snare", {"rope": 2, "vine": 1})
+    assert plan["missing"] == {"rope": 5}
+
+def test_full_substitute_stock_leaves_nothing_missing():
+    recipes = {"snare": {"materials": {"rope": 3}}}
+    planner = CraftingPlanner(recipes, ItemLexicon())
+    plan = planner.plan("snare", {"rope": 1, "vine": 2})
+    assert plan["missing"] == {}
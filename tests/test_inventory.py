@@ -0,0 +1,35 @@
+import pytest
+
+from inventory import InventoryError, InventoryTransaction
+
+def test_a_failed_block_rolls_every_change_back():
+    inventory = {"stick": 2, "stone": 1}
+    commits = []
+    with pytest.raises(InventoryError):
+        with InventoryTransaction(inventory, commits.append) as transaction:
+            transaction.remove("stone")
+            transaction.add("knife")
+            transaction.remove("stick", 3)
+
+    assert inventory == {"stick": 2, "stone": 1}
+    assert commits == []
+
+def test_commit_reports_the_net_change_once():
+    inventory = {"stick": 2, "stone": 1}
+    commits = []
+    with InventoryTransaction(inventory, commits.append) as transaction:
+        transaction.remove("stone")
+        transaction.add("knife")
+        transaction.remove("stick")
+        transaction.add("stick")
+
+    assert inventory == {"stick": 2, "knife": 1}
+    assert commits == [{"stone": 0, "knife": 1}]
+
+def test_nothing_changed_means_no_commit_callback():
+    commits = []
+    with InventoryTransaction({"stick": 1}, commits.append) as transaction:
+        transaction.add("rope")
+        transaction.remove("rope")
+
+    assert commits == []
@@ -0,0 +1,54 @@
+from location_graph import LocationGraph
+from npc_journal import NPCJournal
+
+def new_journal(tmp_path, **kwargs):
+    return NPCJournal(str(tmp_path / "game_characters.json"), str(tmp_path / "game_characters.jsonl"), **kwargs)
+
+def test_npc_journal_replays_adds_updates_and_removals(tmp_path):
+    journal = new_journal(tmp_path)
+    ada = journal.add({"name": "Ada", "type": "vendor"})
+    bo = journal.add({"name": "Bo", "type": "hermit"})
+    journal.update(ada, {"disposition": 3})
+    journal.remove(bo)
+    journal.flush()
+
+    reloaded = new_journal(tmp_path)
+    assert reloaded.npcs == {ada: {"name": "Ada", "type": "vendor", "disposition": 3}}
+    assert reloaded.ids_named("ada") == [ada]
+    assert reloaded.ids_of_type("hermit") == []
+
+def test_ids_are_never_reused_after_compaction(tmp_path):
+    journal = new_journal(tmp_path, compact_every=3)
+    first = journal.add({"name": "Ada", "type": "vendor"})
+    last = journal.add({"name": "Bo", "type": "hermit"})
+    journal.remove(last)
+    journal.flush()
+    assert journal.records == 1  # Compacted down to the id counter
+
+    reloaded = new_journal(tmp_path)
+    assert list(reloaded.npcs) == [first]
+    assert int(reloaded.add({"name": "Cy", "type": "vendor"})) > int(last)
+
+def test_a_torn_last_line_is_skipped(tmp_path):
+    journal = new_journal(tmp_path)
+    ada = journal.add({"name": "Ada", "type": "vendor"})
+    journal.flush()
+    with open(tmp_path / "game_characters.jsonl", "a") as f:
+        f.write('{"op": "put", "id": "2", "np')
+
+    assert list(new_journal(tmp_path).npcs) == [ada]
+
+def test_location_graph_compacts_to_one_record_per_place(tmp_path):
+    path = str(tmp_path / "game_locations.jsonl")
+    graph = LocationGraph(path, compact_ratio=2)
+    ridge = graph.add("A windy ridge.", "ridge")
+    creek = graph.add("A cold creek.", "creek")
+    graph.connect(ridge, "north", creek)
+    graph.update(creek, {"items": {"stone": 2}})
+    graph.flush()
+    assert graph.records == 2
+
+    reloaded = LocationGraph(path)
+    assert reloaded.nodes == graph.nodes
+    assert reloaded.exit(creek, "south") == ridge
+    assert reloaded.add("A hollow.") == "3"
@@ -0,0 +1,60 @@
+import llm_cache
+from llm_cache import ResponseCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_entries_expire_after_their_ttl(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    cache = ResponseCache(str(tmp_path), default_ttl=60)
+    cache.put("short", "a", ttl=10)
+    cache.put("default", "b")
+
+    clock.now += 30
+    assert cache.get("short") is None
+    assert cache.get("default") == "b"
+    assert not (tmp_path / "short.json").exists()
+
+    clock.now += 31
+    assert cache.get("default") is None
+    assert cache.summary()["expired"] == 2
+
+def test_expired_entries_on_disk_are_misses_too(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    ResponseCache(str(tmp_path)).put("key", "reply", ttl=5)
+
+    cache = ResponseCache(str(tmp_path))
+    clock.now += 6
+    assert cache.get("key") is None
+    assert cache.summary()["disk_hits"] == 0
+
+def test_memory_is_least_recently_used_first_and_disk_backs_it(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_memory_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert list(cache.memory) == ["a", "c"]
+    assert cache.get("b") == "2"
+    assert cache.summary()["disk_hits"] == 1
+
+def test_disk_is_trimmed_oldest_first_to_its_size_limit(tmp_path):
+    entry_size = len(llm_cache.json.dumps({"created": 0.0, "ttl": 0, "content": "x" * 100}))
+    cache = ResponseCache(str(tmp_path), max_disk_bytes=entry_size * 2 + entry_size // 2)
+    for key in ("a", "b", "c"):
+        cache.put(key, key * 100)
+
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["b", "c"]
+    assert cache.disk_bytes <= cache.max_disk_bytes
+    assert cache.get("a") is None
+    assert cache.summary()["evictions"] == 1
+
+    reopened = ResponseCache(str(tmp_path), max_disk_bytes=cache.max_disk_bytes)
+    assert reopened.get("c") == "c" * 100
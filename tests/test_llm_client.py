@@ -0,0 +1,43 @@
+from game_state import GameState
+from llm_cache import ResponseCache
+from llm_client import ModelClient
+
+RECIPE = "snare: 2 stick, 1 rope - Bend the stick and tie the rope."
+
+class ScriptedBackend:
+    name = "scripted"
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    def complete(self, params):
+        self.calls += 1
+        return self.replies.pop(0), None
+
+def recipe_client(tmp_path, replies):
+    backend = ScriptedBackend(replies)
+    client = ModelClient(cache=ResponseCache(cache_dir=str(tmp_path / "cache")), backend=backend)
+    return client, backend
+
+def ask(client):
+    return client.complete([{"role": "user", "content": "recipe for snare"}], cache=True,
+                           cache_if=lambda content: GameState.parse_crafting_recipe(content) is not None)
+
+def test_rejected_recipe_is_asked_for_again(tmp_path):
+    client, backend = recipe_client(tmp_path, ["impossible", RECIPE])
+    assert ask(client) == "impossible"
+    assert ask(client) == RECIPE
+    assert backend.calls == 2
+
+def test_valid_recipe_is_served_from_cache(tmp_path):
+    client, backend = recipe_client(tmp_path, [RECIPE])
+    assert ask(client) == RECIPE
+    assert ask(client) == RECIPE
+    assert backend.calls == 1
+
+def test_parse_crafting_recipe():
+    assert GameState.parse_crafting_recipe(RECIPE) == {
+        "materials": {"stick": 2, "rope": 1}, "description": "Bend the stick and tie the rope."}
+    assert GameState.parse_crafting_recipe("impossible") is None
+    assert GameState.parse_crafting_recipe("no idea") is None
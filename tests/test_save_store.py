@@ -0,0 +1,59 @@
+import json
+
+from save_store import SaveStore
+
+def new_store(tmp_path, **kwargs):
+    return SaveStore(str(tmp_path / "game_save.json"), str(tmp_path / "game_save.jsonl"), **kwargs)
+
+def delta_lines(tmp_path):
+    return [json.loads(line) for line in (tmp_path / "game_save.jsonl").read_text().splitlines()]
+
+def test_load_replays_deltas_on_the_base_snapshot(tmp_path):
+    store = new_store(tmp_path)
+    state = {"health": 100, "inventory": {"stick": 2, "stone": 1}}
+    store.save(state, "You set out.")
+    state["health"] = 90
+    state["inventory"]["stick"] = 3
+    del state["inventory"]["stone"]
+    store.mark_dirty("inventory")
+    store.save(state, "You set out.\nYou find a stick.")
+
+    assert new_store(tmp_path).load() == (
+        {"health": 90, "inventory": {"stick": 3}}, "You set out.\nYou find a stick.")
+
+def test_truncated_last_delta_is_skipped(tmp_path):
+    store = new_store(tmp_path)
+    store.save({"health": 100}, "")
+    store.save({"health": 80}, "")
+    with open(tmp_path / "game_save.jsonl", "a") as f:
+        f.write('{"schema": 1, "set": {"hea')
+
+    assert new_store(tmp_path).load() == ({"health": 80}, "")
+
+def test_only_marked_containers_are_diffed(tmp_path):
+    store = new_store(tmp_path)
+    state = {"money": 10, "frame": {"scene": "ridge"}, "inventory": {"stick": 1}}
+    store.save(state)
+    state["money"] = 5
+    state["inventory"]["stick"] = 2
+    state["frame"]["scene"] = "creek"
+    store.mark_dirty("inventory")
+    store.save(state)
+
+    delta = delta_lines(tmp_path)[-1]
+    assert delta["set"] == {"money": 5}
+    assert delta["merge"] == {"inventory": {"set": {"stick": 2}, "del": []}}
+
+def test_compaction_folds_deltas_into_the_base(tmp_path):
+    store = new_store(tmp_path, compact_every=2)
+    store.save({"health": 100})
+    for health in (90, 80, 70):
+        store.save({"health": health})
+
+    assert len(delta_lines(tmp_path)) == 1
+    assert new_store(tmp_path).load() == ({"health": 70}, "")
+
+def test_story_delta_round_trips():
+    old = "line one\nline two\n"
+    for new in ("line two\nline three\n", "something else entirely", old + "more"):
+        assert SaveStore.apply_story(old, SaveStore.story_delta(old, new)) == new
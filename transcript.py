@@ -0,0 +1,89 @@
+import atexit
+import json
+from collections import deque
+
+class Transcript:
+    """
+    Everything the player has been shown this session, kept out of the story widget.
+    Finished lines go to an append-only JSON-lines log on disk; only the last max_lines stay in
+    memory. Older lines are read back from the log on demand through a sparse offset index
+    (one byte offset per index_every lines), so memory stays flat however long the session runs.
+    """
+
+    def __init__(self, path="game_transcript.jsonl", max_lines=500, index_every=64):
+        self.path = path
+        self.max_lines = max_lines
+        self.index_every = index_every
+        self.recent = deque(maxlen=max_lines)  # (text, tag) for the newest finished lines
+        self.pending = ""  # Current line, not finished yet (streamed text arrives in pieces)
+        self.pending_tag = None
+        self.line_count = 0  # Finished lines written to the log
+        self.block_offsets = []  # Byte offset of line number i * index_every
+        self.log_size = 0
+        self.log = open(self.path, "wb")  # A new log per session
+        atexit.register(self.close)
+
+    def append(self, text, tag="game_text"):
+        lines = text.split("\n")
+        for line in lines[:-1]:
+            self.pending += line
+            self.finish_line(self.pending_tag or tag)
+        if lines[-1]:
+            if not self.pending:
+                self.pending_tag = tag
+            self.pending += lines[-1]
+
+    def finish_line(self, tag):
+        if self.line_count % self.index_every == 0:
+            self.block_offsets.append(self.log_size)
+        record = (json.dumps({"text": self.pending, "tag": tag}) + "\n").encode("utf-8")
+        self.log.write(record)
+        self.log_size += len(record)
+        self.recent.append((self.pending, tag))
+        self.line_count += 1
+        self.pending = ""
+        self.pending_tag = None
+
+    def older(self, end, count):
+        """Lines [end - count, end) as (text, tag) pairs, read back from the log"""
+        start = max(0, end - count)
+        if start >= end:
+            return []
+        self.flush()
+        block = start // self.index_every
+        lines = []
+        with open(self.path, "rb") as f:
+            f.seek(self.block_offsets[block])
+            for _ in range(start - block * self.index_every):
+                f.readline()
+            for _ in range(end - start):
+                record = json.loads(f.readline())
+                lines.append((record["text"], record["tag"]))
+        return lines
+
+    def forget_recent(self):
+        """Drop the in-memory lines (the log keeps them), e.g. when the screen is cleared"""
+        self.recent.clear()
+        self.pending = ""
+        self.pending_tag = None
+
+    def recent_text(self, chars=None):
+        """The newest lines as one string, or roughly the last chars characters of them"""
+        if chars is None:
+            return "".join(text + "\n" for text, _ in self.recent) + self.pending
+        recent = [self.pending]
+        length = len(self.pending)
+        for text, _ in reversed(self.recent):
+            if length >= chars:
+                break
+            recent.append(text + "\n")
+            length += len(text) + 1
+        return "".join(reversed(recent))[-chars:]
+
+    def flush(self):
+        if not self.log.closed:
+            self.log.flush()
+
+    def close(self):
+        if not self.log.closed:
+            self.log.close()